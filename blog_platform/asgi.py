@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_platform.settings')
+# the read pages are served by the async views, see blogs.async_views
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,144 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from .storage import BLOB_TMP_PREFIX, DELETING_SUFFIX, is_immutable
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class FileRange:
+    """
+    The part of an open file a Range request asked for. A WSGI server
+    sendfile()s it through fileno() from the current offset, a plain one
+    reads it block by block.
+    """
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """ (start, length) of a single byte range, None to send the whole file """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # several ranges or a broken header, the whole file is a valid answer
+        return None
+    first, last = match.groups()
+    if not first:
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        raise ValueError
+    return start, end - start + 1
+
+
+def media_etag(name, stat):
+    if is_immutable(name):
+        # the file name is the hash of the content
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def is_served(name):
+    """ Uploads only, not the partial writes or the blobs being deleted """
+    return (name.startswith(settings.MEDIA_SERVED_PREFIXES)
+            and not name.startswith(BLOB_TMP_PREFIX) and not name.endswith(DELETING_SUFFIX))
+
+
+def serve_media(request, path):
+    """
+    Send an uploaded file to a signed in user. The web server sends it when
+    MEDIA_SERVE_MODE is 'x-accel-redirect' or 'x-sendfile', so no request
+    worker is held for the transfer. Otherwise it is sent from here with
+    Range and conditional request support.
+    """
+    if not request.user.is_authenticated:
+        raise PermissionDenied
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    # checked once normalized, blobs/../imports/ is not a blob
+    path = os.path.relpath(full_path, os.path.abspath(settings.MEDIA_ROOT)).replace(os.sep, '/')
+    if not is_served(path):
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = media_etag(path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': (f'private, max-age={IMMUTABLE_MAX_AGE}, immutable'
+                          if is_immutable(path) else 'private, no-cache'),
+    }
+    not_modified = get_conditional_response(request, etag=etag,
+                                            last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        # the web server unquotes it, a raw name could end the header or the path
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX + path)
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Sendfile'] = quote(full_path)
+        return response
+
+    headers['Accept-Ranges'] = 'bytes'
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or etag in parse_etags(if_range)):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416, headers=headers)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type, headers=headers)
+    start, length = byte_range
+    response = FileResponse(FileRange(file, start, length), status=206,
+                            content_type=content_type, headers=headers)
+    response['Content-Length'] = length
+    response['Content-Range'] = f'bytes {start}-{start + length - 1}/{stat.st_size}'
+    return response
@@ -0,0 +1,302 @@
+import fcntl
+import glob
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from .timing import current_timings
+
+HEADER = 8
+
+# the values of processes that have exited, see merge_dead_processes
+ARCHIVE = 'archive.db'
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Requests by URL name, method and status', None),
+    'http_request_duration_seconds': (
+        'histogram', 'Time to the response by URL name',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)),
+    'http_response_size_bytes': (
+        'histogram', 'Size of the non streaming responses by URL name',
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)),
+    'db_queries_per_request': (
+        'histogram', 'SQL queries of a request by URL name',
+        (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)),
+    'db_duration_seconds': (
+        'histogram', 'SQL time of a request by URL name',
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)),
+}
+
+
+def _padded(length):
+    # the key and its length prefix fill whole 8 byte words, the value is aligned
+    return length + 8 - (length + 4) % 8
+
+
+def _entries(data, used):
+    """ (key, value, value offset) of the values in a file """
+    position = HEADER
+    while position < used:
+        length, = struct.unpack_from('i', data, position)
+        key = bytes(data[position + 4:position + 4 + length]).decode()
+        value_position = position + 4 + _padded(length)
+        value, = struct.unpack_from('d', data, value_position)
+        yield key, value, value_position
+        position = value_position + 8
+
+
+class ValueFile:
+    """
+    The values of one process in a memory mapped file. Only the process
+    that owns the file writes it, so no lock is held across processes;
+    /metrics reads the files of all of them and adds the values up.
+    Layout: used bytes, then (key length, key, value) entries.
+    """
+    initial_size = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        size = os.fstat(self.file.fileno()).st_size
+        if size == 0:
+            size = self.initial_size
+            self.file.truncate(size)
+        self.capacity = size
+        self.data = mmap.mmap(self.file.fileno(), self.capacity)
+        self.used, = struct.unpack_from('i', self.data, 0)
+        if self.used == 0:
+            self.used = HEADER
+            struct.pack_into('i', self.data, 0, self.used)
+        self.positions = {key: position for key, _, position
+                          in _entries(self.data, self.used)}
+
+    def _add_key(self, key):
+        encoded = key.encode()
+        entry = struct.pack(f'i{_padded(len(encoded))}sd', len(encoded), encoded, 0.0)
+        while self.used + len(entry) > self.capacity:
+            self.capacity *= 2
+            self.data.close()
+            self.file.truncate(self.capacity)
+            self.data = mmap.mmap(self.file.fileno(), self.capacity)
+        self.data[self.used:self.used + len(entry)] = entry
+        self.positions[key] = self.used + len(entry) - 8
+        self.used += len(entry)
+        # the new entry is complete before readers are told about it
+        struct.pack_into('i', self.data, 0, self.used)
+
+    def add(self, key, amount):
+        with self.lock:
+            if key not in self.positions:
+                self._add_key(key)
+            position = self.positions[key]
+            value, = struct.unpack_from('d', self.data, position)
+            struct.pack_into('d', self.data, position, value + amount)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def _read(path):
+    """ The values of a file, {} if it is not written yet """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < HEADER:
+        return {}
+    used, = struct.unpack_from('i', data, 0)
+    return {key: value for key, value, _ in _entries(data, min(used, len(data)))}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _merge_lock(directory, operation):
+    """ Readers share it, merge_dead_processes takes it alone """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'merge.lock'), 'a') as lock:
+        fcntl.flock(lock, operation)
+        yield
+
+
+def merge_dead_processes(directory):
+    """
+    Add the values of the files of exited processes into ARCHIVE and delete
+    the files, like prometheus_client's mark_process_dead, so the totals
+    stay and the files do not pile up. Done under a lock file, so two
+    starting workers never merge the same file twice.
+    """
+    with _merge_lock(directory, fcntl.LOCK_EX):
+        archive = None
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if not name.isdigit() or _alive(int(name)):
+                continue
+            archive = archive or ValueFile(os.path.join(directory, ARCHIVE))
+            for key, value in _read(path).items():
+                archive.add(key, value)
+            os.remove(path)
+        if archive:
+            archive.close()
+
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+def value_file():
+    """ The file of this process, a forked worker opens its own """
+    key = (os.getpid(), settings.METRICS_DIR)
+    if key not in _files:
+        with _files_lock:
+            if key not in _files:
+                merge_dead_processes(settings.METRICS_DIR)
+                _files[key] = ValueFile(os.path.join(settings.METRICS_DIR, f'{os.getpid()}.db'))
+    return _files[key]
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def inc(name, labels, amount=1):
+    value_file().add(_key(name, labels), amount)
+
+
+def observe(name, labels, value):
+    buckets = METRICS[name][2]
+    target = value_file()
+    for bound in buckets:
+        if value <= bound:
+            target.add(_key(f'{name}_bucket', {**labels, 'le': str(bound)}), 1)
+            break
+    else:
+        target.add(_key(f'{name}_bucket', {**labels, 'le': '+Inf'}), 1)
+    target.add(_key(f'{name}_sum', labels), value)
+    target.add(_key(f'{name}_count', labels), 1)
+
+
+def collect():
+    """ The values of all the processes, added up by key """
+    totals = {}
+    # no file is moved into the archive while they are read
+    with _merge_lock(settings.METRICS_DIR, fcntl.LOCK_SH):
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+            for key, value in _read(path).items():
+                totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def _labels(items):
+    if not items:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, value.replace('\\', r'\\').replace('"', r'\"'))
+                             for name, value in items)
+
+
+def _number(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def render():
+    """ The metrics in the Prometheus text format """
+    series = {}
+    for key, value in collect().items():
+        name, items = json.loads(key)
+        series.setdefault(name, {})[tuple(map(tuple, items))] = value
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for items, value in sorted(series.get(name, {}).items()):
+                lines.append(f'{name}{_labels(items)} {_number(value)}')
+            continue
+        counts = series.get(f'{name}_count', {})
+        bucket_values = series.get(f'{name}_bucket', {})
+        for items in sorted(counts):
+            cumulative = 0
+            for bound in [*map(str, buckets), '+Inf']:
+                cumulative += bucket_values.get(tuple(sorted((*items, ('le', bound)))), 0)
+                lines.append(f'{name}_bucket{_labels([*items, ("le", bound)])} '
+                             f'{_number(cumulative)}')
+            lines.append(f'{name}_sum{_labels(items)} '
+                         f'{_number(series[f"{name}_sum"].get(items, 0))}')
+            lines.append(f'{name}_count{_labels(items)} {_number(counts[items])}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Count the requests and observe their latency, response size and SQL,
+    labeled by URL name. Goes right after ServerTimingMiddleware, whose
+    SQL totals it reuses.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, duration):
+        match = request.resolver_match
+        labels = {'view': match.view_name if match else 'unresolved'}
+        inc('http_requests_total', {**labels, 'method': request.method,
+                                    'status': str(response.status_code)})
+        observe('http_request_duration_seconds', labels, duration)
+        if not response.streaming:
+            observe('http_response_size_bytes', labels, len(response.content))
+        timings = current_timings()
+        if timings is not None:
+            observe('db_queries_per_request', labels, timings.queries)
+            observe('db_duration_seconds', labels, timings.db)
+
+
+def metrics_view(request):
+    """
+    Metrics of all the worker processes for Prometheus. With METRICS_TOKEN
+    set the request must carry it as a bearer token, REMOTE_ADDR is then
+    checked too but may be the address of a proxy.
+    """
+    allowed = settings.METRICS_ALLOWED_IPS
+    if allowed and request.META.get('REMOTE_ADDR') not in allowed:
+        raise PermissionDenied
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                         f'Bearer {token}'.encode()):
+        raise PermissionDenied
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,103 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_reading = ContextVar('read_from_replica', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# who is signed in is always read from default: a session made a moment
+# ago may not be on the replicas yet
+PRIMARY_ONLY_APPS = {'sessions', 'auth'}
+
+
+class ReplicaRouter:
+    """
+    Reads made inside read_from_replica() go to one of REPLICA_DATABASES,
+    other reads and every write go to default.
+    """
+    def db_for_read(self, model, **hints):
+        if (_reading.get() and settings.REPLICA_DATABASES
+                and model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return random.choice(settings.REPLICA_DATABASES)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas are copies of default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
+
+
+def is_pinned(request):
+    """ The session wrote recently, its reads must see the write """
+    return settings.REPLICA_PIN_COOKIE in request.COOKIES
+
+
+@contextmanager
+def read_from_replica(request):
+    token = _reading.set(not is_pinned(request))
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+@contextmanager
+def read_from_primary():
+    """ Reads go to default again, inside read_from_replica() too """
+    token = _reading.set(False)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    Run the view, and render its template, with the reads going to a
+    replica, unless the session is pinned to default by a recent write.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        with read_from_replica(request):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                # the lazy querysets of the template are read here too
+                response.render()
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    After a request that may have written, send the next ones of the
+    session to default for REPLICA_PIN_SECONDS, longer than the replicas
+    take to catch up, so the user reads their own writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and settings.REPLICA_DATABASES:
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
@@ -44,7 +44,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog_platform.timing.ServerTimingMiddleware',
+    'blog_platform.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blog_platform.replicas.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +61,8 @@ ROOT_URLCONF = 'blog_platform.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports the render time to ServerTimingMiddleware
+        'BACKEND': 'blog_platform.timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,6 +89,55 @@ DATABASES = {
     }
 }
 
+# SQLITE_PRODUCTION=1 keeps the connections open, turns on WAL and the
+# SQLITE_PRAGMAS and serializes the writers, see blog_platform.sqlite.base
+
+if os.environ.get('SQLITE_PRODUCTION') == '1':
+    DATABASES['default'].update({
+        'ENGINE': 'blog_platform.sqlite',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    # with WAL this never corrupts the database, a power cut may lose the last commits
+    'synchronous': 'normal',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+# Read replicas
+# the feed, blog and entry pages read from REPLICA_DATABASES, see
+# blog_platform.replicas. DB_REPLICAS=2 adds the sqlite copies
+# replica1.sqlite3 and replica2.sqlite3, made and refreshed by
+# `manage.py sync_sqlite_replicas`
+
+REPLICA_DATABASES = []
+
+for number in range(1, int(os.environ.get('DB_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'replica{number}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['blog_platform.replicas.ReplicaRouter']
+
+# a session that wrote reads from default for this long
+REPLICA_PIN_SECONDS = 10
+
+REPLICA_PIN_COOKIE = 'db_pinned'
+
+
+AUTHENTICATION_BACKENDS = [
+    'users.backends.ProfileModelBackend',
+    # sessions started before ProfileModelBackend was added
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -135,7 +188,138 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
 MEDIA_URL = '/media/'
 
+# uploads are sent to signed in users by blog_platform.media.serve_media:
+# 'python' sends them from the view, 'x-accel-redirect' (nginx, with an
+# internal location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) and
+# 'x-sendfile' (apache, lighttpd) hand the transfer to the web server
+
+MEDIA_SERVE_MODE = 'python'
+
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+MEDIA_SERVED_PREFIXES = ('blobs/', 'files/')
+
+# a blob no row points at is deleted once no upload has reused it for this
+# many seconds, those left behind are deleted by `manage.py sweep_blobs`
+
+BLOB_GC_GRACE = 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Tests
+# the runner keeps the tests off the caches of the project directory
+
+TEST_RUNNER = 'blog_platform.testing.TestRunner'
+
+# Entry imports
+# uploads larger than this are queued and run by `manage.py run_import_worker`
+
+ENTRY_IMPORT_INLINE_MAX_SIZE = 256 * 1024
+
+ENTRY_IMPORT_PROCESSES = 2
+
+# a running job whose worker has not reported progress for this long lost
+# its worker and is claimed again
+
+ENTRY_IMPORT_STALE_AFTER = 60 * 60
+
+# Entry exports
+# rows read from the database cursor at a time, also the rows per chunk
+# written to the response
+
+ENTRY_EXPORT_CHUNK_SIZE = 1000
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# the feed cache is shared by all worker processes, it is invalidated
+# by signals, FEED_CACHE_TIMEOUT only clears out old generations
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'feed': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'feed',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+FEED_CACHE_ALIAS = 'feed'
+
+FEED_CACHE_TIMEOUT = 24 * 60 * 60
+
+# RSS and Atom feeds of blogs.feeds, kept in the feed cache
+
+SYNDICATION_ITEMS = 20
+
+# Image variants
+# widths of the resized copies made for every uploaded entry image,
+# 0 processes makes them in the request after commit
+
+IMAGE_VARIANT_WIDTHS = (200, 400, 800)
+
+IMAGE_VARIANT_PROCESSES = 2
+
+# Entry attachments
+# files uploaded with an entry are written to storage by this many threads
+
+ATTACHMENT_SAVE_THREADS = 4
+
+# Metrics
+# every worker process keeps its values in a file of METRICS_DIR,
+# /metrics adds up the files of all of them; the files of exited
+# processes are merged into archive.db when a worker starts
+
+METRICS_DIR = BASE_DIR / 'cache' / 'metrics'
+
+# behind a proxy (nginx) every request comes from its address, so the
+# allowlist alone lets everyone in: set METRICS_TOKEN there, Prometheus
+# then sends it as `Authorization: Bearer <token>` (bearer_token)
+
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# JSON API
+# page size of the entry lists of blogs.api, ?limit= may ask for up to
+# API_MAX_PAGE_SIZE, or API_PUBLIC_MAX_PAGE_SIZE without signing in; the
+# json is written API_STREAM_ROWS rows at a time
+
+API_PAGE_SIZE = 20
+
+API_MAX_PAGE_SIZE = 1000
+
+API_PUBLIC_MAX_PAGE_SIZE = 100
+
+API_STREAM_ROWS = 100
+
+# Async views
+# under ASGI the feed, blog and entry pages are served by blogs.async_views,
+# asgi.py turns this on
+
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS') == '1'
+
+# Logging
+# ServerTimingMiddleware logs the timings of every request at INFO,
+# set TIMING_LOG_LEVEL=INFO to see them
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog_platform.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('TIMING_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,71 @@
+import threading
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3 import base
+from django.dispatch import receiver
+
+_writer_locks = {}
+_writer_locks_lock = threading.Lock()
+
+
+def writer_lock(name):
+    """ The lock the writers of one database file take in this process """
+    with _writer_locks_lock:
+        return _writer_locks.setdefault(str(name), threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    sqlite3 backend for production, see SQLITE_PRODUCTION in settings.
+
+    Every transaction starts with BEGIN IMMEDIATE, so it holds the write
+    lock from the start: a transaction that reads and then writes can no
+    longer fail at once with "database is locked" when another one wrote
+    in between. The threads of a process queue for the transaction on a
+    lock, which wakes the next writer at once, instead of polling in
+    sqlite's busy handler; processes wait on busy_timeout. With WAL the
+    readers never wait for the writer.
+    """
+    holds_writer_lock = False
+
+    def _start_transaction_under_autocommit(self):
+        lock = writer_lock(self.settings_dict['NAME'])
+        timeout = settings.SQLITE_PRAGMAS['busy_timeout'] / 1000
+        self.holds_writer_lock = lock.acquire(timeout=timeout)
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self._release_writer_lock()
+            raise
+
+    def _release_writer_lock(self):
+        if self.holds_writer_lock:
+            self.holds_writer_lock = False
+            writer_lock(self.settings_dict['NAME']).release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_writer_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_writer_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_writer_lock()
+
+
+@receiver(connection_created)
+def set_pragmas(sender, connection, **kwargs):
+    """ WAL, busy_timeout, mmap_size and synchronous from SQLITE_PRAGMAS """
+    if not isinstance(connection, DatabaseWrapper):
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,160 @@
+import glob
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+BLOB_PREFIX = 'blobs/'
+
+# partial writes, and blobs moved aside by collect_blob: never served
+BLOB_TMP_PREFIX = BLOB_PREFIX + 'tmp/'
+DELETING_SUFFIX = '.deleting'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload under the sha256 of its content:
+    blobs/ab/cd/abcd...ef.png. The upload is hashed while it is copied to
+    a temporary file, so it is read once. A second upload of the same
+    content reuses the stored blob and costs no disk. Blob names never
+    change meaning, so they can be served with far-future cache headers.
+    """
+    def get_available_name(self, name, max_length=None):
+        # the name is replaced by the content hash in _save
+        return name
+
+    def _save(self, name, content):
+        return self.save_blob(name, content)[0]
+
+    def save_blob(self, name, content):
+        """
+        Store the content, only the extension of name is kept. Returns the
+        blob name and, when this call wrote the blob rather than reusing
+        it, the mtime the blob got (None otherwise), see collect_blob.
+        """
+        extension = os.path.splitext(name)[1].lower()
+        tmp_dir = self.path(BLOB_TMP_PREFIX)
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            hexdigest = digest.hexdigest()
+            blob_name = f'{BLOB_PREFIX}{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}'
+            blob_path = self.path(blob_name)
+            written_at = None
+            if _touch(blob_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                written_at = os.stat(tmp_path).st_mtime
+                os.replace(tmp_path, blob_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob_name, written_at
+
+
+def _touch(path):
+    """
+    Mark an existing blob as just reused, False if there is none. Until its
+    row is committed the blob is only kept by this mtime, see collect_blob.
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def is_immutable(name):
+    return name.startswith(BLOB_PREFIX)
+
+
+def blob_fields():
+    """ (model, field name) of every file field stored in blob_storage """
+    return [(model, field.name)
+            for model in apps.get_models()
+            for field in model._meta.get_fields()
+            if getattr(field, 'storage', None) is blob_storage]
+
+
+def blob_references(name):
+    """ How many rows point at the blob, each lookup uses the field index """
+    return sum(model._default_manager.filter(**{field: name}).count()
+               for model, field in blob_fields())
+
+
+def collect_blob(name, grace=None, written_at=None):
+    """
+    Delete the blob and its resized copies if no row points at it and no
+    upload has reused it in the last `grace` seconds (BLOB_GC_GRACE), or
+    since its mtime was `written_at`, when the caller wrote it.
+    An upload that finds the blob touches it before inserting its row. The
+    blob is moved aside before its mtime is read, so such an upload either
+    made it too young to delete, or finds it gone and writes it again.
+    """
+    if not name or not is_immutable(name) or blob_references(name):
+        return False
+    path = blob_storage.path(name)
+    aside = f'{path}.{uuid.uuid4().hex}{DELETING_SUFFIX}'
+    try:
+        os.rename(path, aside)
+    except FileNotFoundError:
+        return False
+    mtime = os.stat(aside).st_mtime
+    if written_at is not None:
+        reused = mtime > written_at
+    else:
+        grace = settings.BLOB_GC_GRACE if grace is None else grace
+        reused = time.time() - mtime < grace
+    if reused:
+        # the same content either way, if an upload wrote it again meanwhile
+        os.replace(aside, path)
+        return False
+    os.remove(aside)
+    # resized copies made by blogs.images live next to the blob
+    directory, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+    for variant in glob.glob(os.path.join(directory, '*', f'{stem}_*')):
+        os.remove(variant)
+    return True
+
+
+def release_blob(name):
+    """
+    Delete the blob once the transaction commits, if no row points at it
+    any more. A blob reused within BLOB_GC_GRACE is left to sweep_blobs.
+    """
+    transaction.on_commit(lambda: collect_blob(name))
+
+
+def discard_blobs(written):
+    """
+    Delete at once the blobs a transaction that rolled back wrote, given
+    as (name, written_at) of save_blob, unless an upload reused them since
+    """
+    for name, written_at in written:
+        collect_blob(name, written_at=written_at)
+
+
+def blob_names():
+    """ Storage names of all the blobs, not their resized copies """
+    root = blob_storage.path('')
+    for path in glob.iglob(os.path.join(root, BLOB_PREFIX, '??', '??', '*')):
+        if os.path.isfile(path) and not path.endswith(DELETING_SUFFIX):
+            yield os.path.relpath(path, root).replace(os.sep, '/')
@@ -0,0 +1,76 @@
+import abc
+import functools
+import shutil
+import tempfile
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests off the shared stores of the project directory: the feed
+    cache is kept in memory, so no page rendered from the test database is
+    left for the dev server, and the metrics files go to a temporary
+    directory, out of the totals of /metrics. Tests of cached pages clear
+    the feed cache in setUp.
+    """
+    def test_settings(self):
+        caches = {**settings.CACHES, 'feed': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'feed',
+        }}
+        return {'CACHES': caches, 'METRICS_DIR': self.metrics_dir}
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = tempfile.mkdtemp()
+        self.overrides = override_settings(**self.test_settings())
+        self.overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.overrides.disable()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetMixin(abc.ABC):
+    """
+    TestCase mixin for the tests decorated with query_budget: each of them
+    is run once the table holds every number of rows in budget_row_counts.
+    make_rows adds the rows the views list, so an N+1 lookup shows up as a
+    query count that grows.
+    """
+    budget_row_counts = (10, 1000)
+
+    @abc.abstractmethod
+    def make_rows(self, count):
+        """ Add count more rows of every kind the views show """
+
+
+def query_budget(max_queries):
+    """
+    The request made by the decorated test runs at most max_queries
+    queries, and the same number whatever the amount of rows.
+    """
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(self):
+            counts = {}
+            made = 0
+            for rows in self.budget_row_counts:
+                self.make_rows(rows - made)
+                made = rows
+                with CaptureQueriesContext(connection) as queries:
+                    test(self)
+                counts[rows] = len(queries)
+                executed = '\n'.join(f'{number}. {query["sql"]}' for number, query
+                                     in enumerate(queries.captured_queries, start=1))
+                self.assertLessEqual(len(queries), max_queries,
+                                     f'{len(queries)} queries at {rows} rows, the budget is '
+                                     f'{max_queries}:\n{executed}')
+            self.assertEqual(len(set(counts.values())), 1,
+                             f'the query count grows with the rows: {counts}')
+        return wrapper
+    return decorator
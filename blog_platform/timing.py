@@ -0,0 +1,153 @@
+import logging
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timings', default=None)
+
+
+def current_timings():
+    """ The timings of the request being served, None outside of one """
+    return _current.get()
+
+
+class RequestTimings:
+    """ Time spent by one request in SQL and in template rendering, in seconds """
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.db_in_template = 0.0
+        self.rendering = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # a connection.execute_wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            spent = time.perf_counter() - start
+            self.queries += 1
+            self.db += spent
+            if self.rendering:
+                # a lazy queryset evaluated by the template
+                self.db_in_template += spent
+
+    def render(self, template, context, request):
+        if self.rendering:
+            return template.render(context, request)
+        self.rendering = 1
+        start = time.perf_counter()
+        try:
+            return template.render(context, request)
+        finally:
+            self.template += time.perf_counter() - start
+            self.rendering = 0
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_timer(connection, **kwargs):
+    """
+    Time the queries of the connection for good. The request is found
+    through the context, which sync_to_async carries over, so the queries
+    that async views run in the sync thread are counted too. Goes first,
+    so the wrappers other code pushes and pops stay on top of it.
+    """
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _timed_execute)
+
+
+connection_created.connect(install_timer)
+for _connection in connections.all():
+    install_timer(_connection)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        return timings.render(super(), context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates that adds the time of every top level render, the
+    templates it extends and includes counted in, to the request timings.
+    The template_rendered signal cannot be used: Django only sends it
+    under the test runner.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    """
+    Split the time of each request into SQL, template rendering and the
+    rest (view code and middleware), send it in the Server-Timing header
+    and log it under the URL name. Costs two clock reads per query and
+    per render. Goes first in MIDDLEWARE, so total covers the others.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, start)
+
+    def finish(self, request, response, timings, start):
+        total = time.perf_counter() - start
+        template = timings.template - timings.db_in_template
+        app = max(total - timings.db - template, 0.0)
+        response['Server-Timing'] = (
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries", '
+            f'tpl;dur={template * 1000:.1f}, app;dur={app * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}')
+        match = request.resolver_match
+        url_name = match.view_name if match else '-'
+        logger.info('url=%s status=%d total_ms=%.1f db_ms=%.1f queries=%d '
+                    'template_ms=%.1f app_ms=%.1f', url_name, response.status_code,
+                    total * 1000, timings.db * 1000, timings.queries,
+                    template * 1000, app * 1000,
+                    extra={'url_name': url_name, 'status': response.status_code,
+                           'total_ms': total * 1000, 'db_ms': timings.db * 1000,
+                           'queries': timings.queries, 'template_ms': template * 1000,
+                           'app_ms': app * 1000})
+        return response
@@ -14,10 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, re_path, include
 from django.conf import settings
+from .media import serve_media
+from .metrics import metrics_view
 
 
 urlpatterns = [
@@ -25,4 +27,7 @@ urlpatterns = [
     path('i18n', include('django.conf.urls.i18n')),
     path('users/', include('users.urls')),
     path('blogs/', include('blogs.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('metrics', metrics_view, name='metrics'),
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media,
+            name='media'),
+]
@@ -1,10 +1,11 @@
 from django.contrib import admin
-from .models import Blog, Entry, File
+from .models import Blog, Entry, File, ImportJob, Tag
 
 
 @admin.register(Blog)
 class BlogAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'tags']
+    exclude = ['tag_set']
 
 
 @admin.register(Entry)
@@ -15,3 +16,14 @@ class EntryAdmin(admin.ModelAdmin):
 @admin.register(File)
 class FileAdmin(admin.ModelAdmin):
     list_display = ['id', 'entry', 'description']
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'blog', 'status', 'created', 'skipped', 'malformed', 'queued_at']
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'entry_count']
+    readonly_fields = ['entry_count']
@@ -0,0 +1,174 @@
+from functools import wraps
+from operator import attrgetter
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext as _
+from django.views.decorators.http import condition, require_safe
+from .conditional import api_blog_etag, api_entry_etag, api_feed_etag
+from .models import Blog, Entry, parse_tags
+from .pagination import KeysetPaginator
+
+# Read-only JSON for the mobile client: /blogs/api/...
+# ?fields=title,pub_date picks the fields, ?limit= and ?cursor= the page.
+
+
+class FieldSet:
+    """
+    The fields a resource can return: name -> (model fields to load, value).
+    Only the model fields of the picked names are loaded, with .only().
+    """
+    def __init__(self, fields, default=None):
+        self.fields = fields
+        self.default = default or tuple(fields)
+
+    def pick(self, request):
+        value = request.GET.get('fields')
+        if value is None:
+            return self.default
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            message = _('Неизвестные поля: %(fields)s. Доступны: %(known)s')
+            raise BadRequest(message % {'fields': ', '.join(unknown) or '-',
+                                        'known': ', '.join(self.fields)})
+        return names
+
+    def project(self, queryset, names, always=('id',)):
+        paths = [*always, *(path for name in names for path in self.fields[name][0])]
+        related = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*paths)
+
+    def serialize(self, instance, names):
+        return {name: self.fields[name][1](instance) for name in names}
+
+
+def _files(entry):
+    return [{'url': file.file.url, 'display_url': file.display_url, 'srcset': file.srcset,
+             'width': file.width, 'height': file.height, 'description': file.description}
+            for file in entry.files.all()]
+
+
+ENTRY_FIELDS = FieldSet({
+    'id': (('id',), attrgetter('id')),
+    'title': (('title',), attrgetter('title')),
+    'body_text': (('body_text',), attrgetter('body_text')),
+    'pub_date': (('pub_date',), attrgetter('pub_date')),
+    'mod_date': (('mod_date',), attrgetter('mod_date')),
+    'blog': (('blog',), attrgetter('blog_id')),
+    'author': (('blog', 'blog__user', 'blog__user__username'), attrgetter('blog.user.username')),
+}, default=('id', 'title', 'pub_date', 'mod_date', 'blog', 'author'))
+
+# one entry also has its files, read by a query of their own
+ENTRY_DETAIL_FIELDS = FieldSet({**ENTRY_FIELDS.fields, 'files': ((), _files)})
+
+BLOG_FIELDS = FieldSet({
+    'id': (('id',), attrgetter('id')),
+    'name': (('name',), attrgetter('name')),
+    'tags': (('tags',), lambda blog: parse_tags(blog.tags)),
+    'owner': (('user', 'user__username'), attrgetter('user.username')),
+    'entry_count': (('entry_count',), attrgetter('entry_count')),
+    'file_count': (('file_count',), attrgetter('file_count')),
+    'last_pub_date': (('last_pub_date',), attrgetter('last_pub_date')),
+})
+
+
+def api_error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_view(login_required=False):
+    """ GET and HEAD only, errors as json rather than html pages """
+    def decorator(view):
+        @require_safe
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if login_required and not request.user.is_authenticated:
+                return api_error(_('Требуется вход'), 403)
+            try:
+                return view(request, *args, **kwargs)
+            except BadRequest as exc:
+                return api_error(str(exc), 400)
+            except Http404 as exc:
+                return api_error(str(exc), 404)
+        return wrapper
+    return decorator
+
+
+def page_size(request):
+    """ ?limit=, large pages are for signed in users only """
+    if request.user.is_authenticated:
+        max_limit = settings.API_MAX_PAGE_SIZE
+    else:
+        max_limit = settings.API_PUBLIC_MAX_PAGE_SIZE
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= max_limit:
+        raise BadRequest(_('limit должен быть от 1 до %(max)d') % {'max': max_limit})
+    return limit
+
+
+def stream_page(page, fields, names):
+    """
+    {"results": [...], "next": cursor, "previous": cursor} of a
+    KeysetStream, written API_STREAM_ROWS rows at a time as they are read
+    """
+    encoder = DjangoJSONEncoder()
+    yield '{"results": ['
+    separator, rows = '', []
+    for instance in page:
+        rows.append(encoder.encode(fields.serialize(instance, names)))
+        if len(rows) == settings.API_STREAM_ROWS:
+            yield separator + ', '.join(rows)
+            separator, rows = ', ', []
+    if rows:
+        yield separator + ', '.join(rows)
+    yield (f'], "next": {encoder.encode(page.next_cursor)}, '
+           f'"previous": {encoder.encode(page.previous_cursor)}}}')
+
+
+def entry_page_response(request, queryset):
+    """ A page of entries in (-pub_date, id) order, streamed """
+    names = ENTRY_FIELDS.pick(request)
+    queryset = ENTRY_FIELDS.project(queryset, names, always=('id', 'pub_date'))
+    paginator = KeysetPaginator(queryset, page_size(request))
+    page = paginator.stream(request.GET.get('cursor'), chunk_size=settings.API_STREAM_ROWS)
+    return StreamingHttpResponse(stream_page(page, ENTRY_FIELDS, names),
+                                 content_type='application/json')
+
+
+@api_view()
+@condition(etag_func=api_feed_etag)
+def feed(request):
+    """ Entries of all the blogs, newest first """
+    return entry_page_response(request, Entry.objects.all())
+
+
+@api_view(login_required=True)
+@condition(etag_func=api_blog_etag)
+def blog_detail(request, pk):
+    names = BLOG_FIELDS.pick(request)
+    blog = get_object_or_404(BLOG_FIELDS.project(Blog.objects, names), pk=pk)
+    return JsonResponse(BLOG_FIELDS.serialize(blog, names))
+
+
+@api_view(login_required=True)
+@condition(etag_func=api_blog_etag)
+def blog_entries(request, pk):
+    """ Entries of the blog, newest first """
+    get_object_or_404(Blog.objects.only('id'), pk=pk)
+    return entry_page_response(request, Entry.objects.filter(blog_id=pk))
+
+
+@api_view(login_required=True)
+@condition(etag_func=api_entry_etag)
+def entry_detail(request, pk):
+    names = ENTRY_DETAIL_FIELDS.pick(request)
+    entry = get_object_or_404(ENTRY_DETAIL_FIELDS.project(Entry.objects, names), pk=pk)
+    return JsonResponse(ENTRY_DETAIL_FIELDS.serialize(entry, names))
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 from django.utils.translation import gettext_lazy as _
 
 
@@ -6,3 +7,8 @@ class BlogsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blogs'
     verbose_name = _('блоги')
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import install_search_index
+        post_migrate.connect(install_search_index, sender=self)
@@ -0,0 +1,124 @@
+import abc
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.translation import gettext as _
+from django.views import generic
+from blog_platform.replicas import read_from_replica
+from .conditional import aload_blog_state, aload_entry_state, blog_etag, entry_etag
+from .feed_cache import acached_feed
+from .models import Blog, Entry
+from .pagination import apaginate_keyset
+
+# Async versions of the read pages of blogs.views, routed by blogs.urls
+# when ASYNC_READ_VIEWS is on. All the rows are read with the async ORM
+# before rendering, so the templates run in the event loop and read nothing.
+
+
+def _load_user(request):
+    user = request.user
+    if user.is_authenticated:
+        # sessions of ModelBackend do not select the profile, a missing
+        # one is cached as such by the descriptor
+        getattr(user, 'profiles', None)
+
+
+async def load_user(request):
+    """
+    Read the session, the user of the request and the profile the pages
+    show. The ORM may not be used from the event loop, so they are
+    resolved in the sync thread once.
+    """
+    await sync_to_async(_load_user)(request)
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(_('No %(verbose_name)s found matching the query')
+                      % {'verbose_name': queryset.model._meta.verbose_name})
+
+
+async def respond_conditionally(request, etag, respond):
+    """ The condition() decorator for async views: respond() runs unless it is a 304 """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = await respond()
+    if etag:
+        response.headers.setdefault('ETag', etag)
+    return response
+
+
+class AsyncPageView(abc.ABC, generic.View):
+    """ Signed in user, replica reads and rendering of the async pages """
+    template_name = None
+    login_required = False
+
+    async def get(self, request, *args, **kwargs):
+        await load_user(request)
+        if self.login_required and not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        with read_from_replica(request):
+            return await self.respond(request, **kwargs)
+
+    @abc.abstractmethod
+    async def respond(self, request, **kwargs):
+        """ The response to a GET, once the user is loaded and reads go to a replica """
+
+    def render(self, context, template_name=None):
+        context.setdefault('view', self)
+        return HttpResponse(render_to_string(template_name or self.template_name,
+                                             context, self.request))
+
+
+class MainPageView(AsyncPageView):
+    template_name = 'app_blogs/entry_all.html'
+    feed_template_name = 'app_blogs/entry_feed.html'
+    paginate_by = 20
+
+    async def make_feed(self):
+        page = await apaginate_keyset(self.request, Entry.objects.feed(), self.paginate_by)
+        return render_to_string(self.feed_template_name, {
+            'view': self, 'entry_list': page.object_list,
+            'page_obj': page, 'is_paginated': page.has_other_pages(),
+        }, self.request)
+
+    async def respond(self, request, **kwargs):
+        feed_html = await acached_feed(request, self.make_feed)
+        return self.render({'feed_html': feed_html})
+
+
+class BlogDetailView(AsyncPageView):
+    template_name = 'app_blogs/entry_list.html'
+    login_required = True
+    paginate_by = 20
+
+    async def respond(self, request, pk):
+        await aload_blog_state(request, pk)
+
+        async def page():
+            blog = await aget_object_or_404(Blog.objects, pk=pk)
+            page = await apaginate_keyset(request, blog.entries.listing(), self.paginate_by)
+            return self.render({'blog': blog, 'object': blog,
+                                'page_obj': page, 'entry_list': page.object_list})
+
+        return await respond_conditionally(request, blog_etag(request, pk), page)
+
+
+class EntryDetailView(AsyncPageView):
+    template_name = 'app_blogs/entry_detail.html'
+    login_required = True
+
+    async def respond(self, request, pk):
+        await aload_entry_state(request, pk)
+
+        async def page():
+            # the author is shown with the entry
+            entry = await aget_object_or_404(Entry.objects.select_related('blog__user'), pk=pk)
+            files = [file async for file in entry.files.aiterator()]
+            return self.render({'entry': entry, 'object': entry, 'files': files})
+
+        return await respond_conditionally(request, entry_etag(request, pk), page)
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.files.images import get_image_dimensions
+from django.db import transaction
+from blog_platform.storage import blob_storage, discard_blobs
+from .images import schedule_variants
+from .models import File, adjust_blog_counters
+
+
+class AttachmentBatch:
+    """
+    Files of one entry form. They are written to storage in a thread pool,
+    hashing and disk writes release the GIL, and their rows are inserted
+    with one bulk_create. Use it through attachment_batch().
+    """
+    def __init__(self):
+        # (name, mtime) of the blobs this batch wrote, not of those it reused
+        self.written = []
+
+    def _write(self, item, upload):
+        try:
+            item.width, item.height = get_image_dimensions(upload)
+        except (OSError, TypeError):
+            pass
+        name, written_at = blob_storage.save_blob(upload.name, upload)
+        item.file = name
+        if written_at is not None:
+            self.written.append((name, written_at))
+
+    def save(self, entry, uploads, description=''):
+        items = [File(entry=entry, description=description or '') for _ in uploads]
+        if not items:
+            return items
+        workers = min(settings.ATTACHMENT_SAVE_THREADS, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._write, item, upload)
+                       for item, upload in zip(items, uploads)]
+        for future in futures:
+            future.result()
+        File.objects.bulk_create(items)
+        # bulk_create sends no post_save: the files are counted and their
+        # variants asked for here
+        adjust_blog_counters(blog_id=entry.blog_id, files=len(items))
+        for item in items:
+            schedule_variants(item)
+        return items
+
+
+@contextmanager
+def attachment_batch():
+    """
+    transaction.atomic for saving an entry with its files. If the block
+    rolls back, the blobs it wrote are deleted at once, unless another
+    upload reused them meanwhile.
+    """
+    batch = AttachmentBatch()
+    try:
+        with transaction.atomic():
+            yield batch
+    except BaseException:
+        discard_blobs(batch.written)
+        raise
@@ -0,0 +1,107 @@
+import hashlib
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import translation
+from .feed_cache import feed_generation
+from .models import Blog, Entry
+
+AUTHOR_FIELDS = ('blog__user__username', 'blog__user__first_name', 'blog__user__last_name')
+
+
+def _viewer(request):
+    """ The parts of the page that depend on who is looking at it """
+    user = request.user
+    avatar = ''
+    if user.is_authenticated:
+        profile = getattr(user, 'profiles', None)
+        avatar = profile.avatar_url if profile else ''
+    return [user.pk, avatar, translation.get_language()]
+
+
+def _etag(request, values):
+    if values is None or len(get_messages(request)):
+        # a pending message must be shown, so the page is rendered anew
+        return None
+    digest = hashlib.md5(repr(values + _viewer(request)).encode()).hexdigest()
+    # weak: the csrf token in the page is masked differently on each render
+    return f'W/"{digest}"'
+
+
+def _entry_state(request, pk):
+    """ Everything the entry page shows, in one indexed query """
+    if not hasattr(request, '_entry_state'):
+        request._entry_state = _entry_state_query(pk).first()
+    return request._entry_state
+
+
+def _entry_state_query(pk):
+    return (Entry.objects.filter(pk=pk).order_by()
+            .annotate(file_count=Count('files'), last_file=Max('files__id'))
+            .values_list('mod_date', 'file_count', 'last_file', *AUTHOR_FIELDS))
+
+
+async def aload_entry_state(request, pk):
+    """ Read the entry state ahead, so entry_etag runs no query in async views """
+    request._entry_state = await _entry_state_query(pk).afirst()
+
+
+def entry_etag(request, pk):
+    state = _entry_state(request, pk)
+    return _etag(request, state and list(state))
+
+
+def _last_mod_date():
+    """ The newest mod_date of the blog's entries, one seek on entry_blog_mod_idx """
+    return Subquery(Entry.objects.filter(blog_id=OuterRef('pk')).order_by('-mod_date')
+                    .values('mod_date')[:1])
+
+
+def _blog_state(request, pk):
+    """ The blog and the newest change among its entries, in one indexed query """
+    if not hasattr(request, '_blog_state'):
+        request._blog_state = _blog_state_query(pk).first()
+    return request._blog_state
+
+
+def _blog_state_query(pk):
+    return (Blog.objects.filter(pk=pk)
+            .annotate(last_mod=_last_mod_date())
+            .values_list('last_mod', 'entry_count', 'name'))
+
+
+async def aload_blog_state(request, pk):
+    """ Read the blog state ahead, so blog_etag runs no query in async views """
+    request._blog_state = await _blog_state_query(pk).afirst()
+
+
+def blog_etag(request, pk):
+    state = _blog_state(request, pk)
+    if state is None:
+        return None
+    return _etag(request, list(state) + [request.GET.get('cursor')])
+
+
+def _api_etag(request, values):
+    # the json depends on the query string, not on who asks for it
+    if values is None:
+        return None
+    digest = hashlib.md5(repr(values + [request.get_full_path()]).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def api_feed_etag(request):
+    return _api_etag(request, [feed_generation()])
+
+
+def api_entry_etag(request, pk):
+    state = _entry_state(request, pk)
+    return _api_etag(request, state and list(state))
+
+
+def api_blog_etag(request, pk):
+    """ Covers the blog and its entries, in one indexed query """
+    state = (Blog.objects.filter(pk=pk)
+             .annotate(last_mod=_last_mod_date())
+             .values_list('last_mod', 'name', 'tags', 'user__username', *Blog.counter_fields)
+             .first())
+    return _api_etag(request, state and list(state))
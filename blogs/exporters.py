@@ -0,0 +1,48 @@
+import csv
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Entry
+
+
+class _Echo:
+    """ A file for csv.writer that hands each line back instead of keeping it """
+    def write(self, value):
+        return value
+
+
+def _rows(blog_id, fields):
+    """ Entries of the blog oldest first, read from the cursor a chunk at a time """
+    return (Entry.objects.filter(blog_id=blog_id).order_by('pub_date', 'id')
+            .values_list(*fields).iterator(chunk_size=settings.ENTRY_EXPORT_CHUNK_SIZE))
+
+
+def _chunks(lines):
+    """ Join the lines by ENTRY_EXPORT_CHUNK_SIZE, so the socket gets fewer, larger writes """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == settings.ENTRY_EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def export_csv(blog_id):
+    """ `title,body` rows, the format import_entries reads """
+    writer = csv.writer(_Echo(), quotechar='"')
+    return _chunks(writer.writerow(row) for row in _rows(blog_id, ('title', 'body_text')))
+
+
+def export_jsonl(blog_id):
+    """ One json object per line, with the dates """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    keys = ('title', 'body', 'pub_date', 'mod_date')
+    rows = _rows(blog_id, ('title', 'body_text', 'pub_date', 'mod_date'))
+    return _chunks(encoder.encode(dict(zip(keys, row))) + '\n' for row in rows)
+
+
+EXPORT_FORMATS = {
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (export_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
@@ -0,0 +1,136 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+from blog_platform.replicas import read_from_primary
+
+GENERATION_KEY = 'feed:generation'
+HITS_KEY = 'feed:hits'
+MISSES_KEY = 'feed:misses'
+
+
+def feed_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def _new_generation():
+    # a fresh value rather than incr: concurrent bumps can never collapse
+    # into one, even on backends without an atomic incr
+    feed_cache().set(GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate_feed():
+    """
+    Drop every cached feed page by starting a new generation of keys.
+    Inside a transaction the generation changes again on commit, so a page
+    rendered from the data as it was before the commit is never kept.
+    """
+    _new_generation()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_new_generation)
+
+
+def _page_key(request, generation):
+    page = hashlib.md5(f'{request.path}?{request.GET.get("cursor", "")}'.encode()).hexdigest()
+    return f'feed:{generation}:{translation.get_language()}:{page}'
+
+
+def feed_generation():
+    """ Changes whenever the feed does, see invalidate_feed """
+    cache = feed_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def feed_cache_key(request):
+    return _page_key(request, feed_generation())
+
+
+async def afeed_cache_key(request):
+    """ feed_cache_key for async views """
+    cache = feed_cache()
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, time.time_ns(), None)
+        generation = await cache.aget(GENERATION_KEY)
+    return _page_key(request, generation)
+
+
+def _count(key):
+    cache = feed_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+async def _acount(key):
+    cache = feed_cache()
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, None)
+        await cache.aincr(key)
+
+
+def feed_cache_stats():
+    cache = feed_cache()
+    hits, misses = cache.get(HITS_KEY, 0), cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else 0.0}
+
+
+class CachedFeedMixin:
+    """
+    Cache the feed part of the page per language and cursor. The page
+    around it (user bar, csrf token) is still rendered per request, but a
+    hit runs no feed query at all. Invalidated by blogs.signals.
+    A miss is read from default, even in a view that reads from replicas:
+    a page cached from a lagging replica would be served until the next
+    invalidation, long after the replica caught up.
+    """
+    feed_template_name = 'app_blogs/entry_feed.html'
+
+    def get(self, request, *args, **kwargs):
+        cache = feed_cache()
+        key = feed_cache_key(request)
+        feed_html = cache.get(key)
+        if feed_html is not None:
+            _count(HITS_KEY)
+            self.object_list = self.model.objects.none()
+            return self.render_to_response({'view': self, 'feed_html': mark_safe(feed_html)})
+        _count(MISSES_KEY)
+        with read_from_primary():
+            self.object_list = self.get_queryset()
+            context = self.get_context_data()
+            feed_html = render_to_string(self.feed_template_name, context, request)
+        cache.set(key, feed_html, settings.FEED_CACHE_TIMEOUT)
+        context['feed_html'] = mark_safe(feed_html)
+        return self.render_to_response(context)
+
+
+async def acached_feed(request, make_feed):
+    """
+    The feed part of the page for async views: from the cache, or made by
+    await make_feed() from default and cached. Same keys as CachedFeedMixin.
+    """
+    cache = feed_cache()
+    key = await afeed_cache_key(request)
+    feed_html = await cache.aget(key)
+    if feed_html is not None:
+        await _acount(HITS_KEY)
+        return mark_safe(feed_html)
+    await _acount(MISSES_KEY)
+    with read_from_primary():
+        feed_html = await make_feed()
+    await cache.aset(key, feed_html, settings.FEED_CACHE_TIMEOUT)
+    return mark_safe(feed_html)
@@ -0,0 +1,109 @@
+import hashlib
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe
+from django.utils.translation import gettext_lazy as _
+from .feed_cache import feed_cache, feed_generation
+from .models import Blog, Entry
+
+
+class LatestEntriesFeed(Feed):
+    """ RSS of the newest entries of all the blogs """
+    title = _('Платформа блогов')
+    link = reverse_lazy('main')
+    description = _('Новые статьи всех блогов')
+
+    def entries(self):
+        # the feed columns and mod_date, for the updated dates
+        return Entry.objects.feed().only(
+            'title', 'pub_date', 'mod_date', 'blog', 'blog__user', 'blog__user__username')
+
+    def items(self):
+        return self.entries()[:settings.SYNDICATION_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('detail-entry', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.mod_date
+
+    def item_author_name(self, item):
+        return item.blog.user.username
+
+
+class LatestEntriesAtomFeed(LatestEntriesFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestEntriesFeed.description
+
+
+class BlogEntriesFeed(LatestEntriesFeed):
+    """ RSS of the newest entries of one blog """
+    def get_object(self, request, pk):
+        return get_object_or_404(Blog.objects.select_related('user').only(
+            'name', 'user', 'user__username'), pk=pk)
+
+    def title(self, blog):
+        return blog.name
+
+    def link(self, blog):
+        return reverse('entry-list', args=[blog.pk])
+
+    def description(self, blog):
+        return _('Новые статьи блога «%(name)s»') % {'name': blog.name}
+
+    def items(self, blog):
+        return self.entries().filter(blog=blog)[:settings.SYNDICATION_ITEMS]
+
+
+class BlogEntriesAtomFeed(BlogEntriesFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, blog):
+        return self.description(blog)
+
+
+def cached_feed(feed):
+    """
+    Serve the feed from the feed cache. The body, its Last-Modified (the
+    newest pub_date or mod_date of the items) and its ETag are kept
+    together, so a poll with If-Modified-Since or If-None-Match is
+    answered without a query. Invalidated by blogs.signals.
+    """
+    def view(request, *args, **kwargs):
+        cache = feed_cache()
+        # read before rendering: a change meanwhile moves to a new key
+        key = (f'syndication:{feed_generation()}:{translation.get_language()}:'
+               f'{hashlib.md5(request.path.encode()).hexdigest()}')
+        cached = cache.get(key)
+        if cached is None:
+            response = feed(request, *args, **kwargs)
+            etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+            cached = (response['Content-Type'], response.get('Last-Modified'), etag,
+                      response.content)
+            cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+        content_type, last_modified, etag, content = cached
+        response = get_conditional_response(
+            request, etag=etag,
+            last_modified=last_modified and parse_http_date_safe(last_modified))
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        if last_modified:
+            response['Last-Modified'] = last_modified
+        response['ETag'] = etag
+        return response
+    return view
@@ -0,0 +1,117 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+
+
+def variant_name(name, width):
+    """ files/photo.jpg -> files/variants/photo_400w.jpg """
+    directory, filename = os.path.split(name)
+    stem, ext = os.path.splitext(filename)
+    return os.path.join(directory, 'variants', f'{stem}_{width}w{ext}')
+
+
+def make_variants(path, targets):
+    """
+    Write downscaled copies of the image at path. Runs in the process pool,
+    so it only touches files: targets is a list of (width, output path).
+    Returns the size of the original and the widths written.
+    """
+    with Image.open(path) as image:
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        size = image.size
+        written = []
+        for width, target in targets:
+            if width >= image.width:
+                continue
+            height = round(image.height * width / image.width)
+            variant = image.resize((width, height), Image.LANCZOS)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            options = {'quality': 85, 'optimize': True} if image_format == 'JPEG' else {}
+            variant.save(target, image_format, **options)
+            written.append(width)
+    return size, written
+
+
+def variant_targets(field_file, widths):
+    name = field_file.name
+    return [(width, field_file.storage.path(variant_name(name, width))) for width in widths]
+
+
+def thumbnail_name(name, size):
+    """ files/photo.jpg -> files/thumbs/photo_50x50.jpg """
+    directory, filename = os.path.split(name)
+    stem, ext = os.path.splitext(filename)
+    return os.path.join(directory, 'thumbs', f'{stem}_{size}x{size}{ext}')
+
+
+def make_thumbnail(path, target, size):
+    """ Write a square, center cropped copy of the image at path """
+    with Image.open(path) as image:
+        image_format = image.format
+        thumbnail = ImageOps.fit(ImageOps.exif_transpose(image), (size, size), Image.LANCZOS)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        thumbnail.save(target, image_format)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_VARIANT_PROCESSES)
+    return _pool
+
+
+def _after_commit(work, args, store, name):
+    """
+    Run work(*args) in the process pool once the transaction commits, so
+    the upload request does not wait for Pillow, then store() the result.
+    With IMAGE_VARIANT_PROCESSES = 0 the work runs inline after commit.
+    """
+    if not settings.IMAGE_VARIANT_PROCESSES:
+        transaction.on_commit(lambda: store(work(*args)))
+        return
+
+    def done(future):
+        # runs in the pool's management thread, which has its own connection
+        try:
+            store(future.result())
+        except Exception:
+            logger.exception('resizing %s failed', name)
+        finally:
+            connections.close_all()
+
+    transaction.on_commit(lambda: get_pool().submit(work, *args).add_done_callback(done))
+
+
+def schedule_variants(instance, field_name='file', widths=None):
+    """ Make the resized variants of an image field and record them on the row """
+    widths = widths or settings.IMAGE_VARIANT_WIDTHS
+    model, pk = type(instance), instance.pk
+    field_file = getattr(instance, field_name)
+
+    def store(result):
+        (width, height), written = result
+        model.objects.filter(pk=pk).update(width=width, height=height, variants=written)
+
+    _after_commit(make_variants, (field_file.path, variant_targets(field_file, widths)),
+                  store, field_file.name)
+
+
+def schedule_thumbnail(instance, field_name, thumb_field, size):
+    """ Make a square thumbnail of an image field and record its name in thumb_field """
+    model, pk = type(instance), instance.pk
+    field_file = getattr(instance, field_name)
+    thumb = thumbnail_name(field_file.name, size)
+
+    def store(result):
+        model.objects.filter(pk=pk).update(**{thumb_field: thumb})
+
+    _after_commit(make_thumbnail, (field_file.path, field_file.storage.path(thumb), size),
+                  store, field_file.name)
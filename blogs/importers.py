@@ -0,0 +1,165 @@
+import csv
+from dataclasses import dataclass
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .feed_cache import invalidate_feed
+from .models import (Blog, Entry, ImportJob, adjust_blog_counters, adjust_tag_entry_counts,
+                     title_hash)
+
+TITLE_MAX_LENGTH = Entry._meta.get_field('title').max_length
+
+# a batch whose titles keep being taken by other writers is given up after
+# this many inserts
+SAVE_BATCH_ATTEMPTS = 3
+
+
+@dataclass
+class ImportResult:
+    """ Summary of an entry import """
+    created: int = 0
+    skipped: int = 0
+    malformed: int = 0
+
+    @property
+    def processed(self):
+        return self.created + self.skipped + self.malformed
+
+
+def _decode_lines(file, result, encoding='utf-8'):
+    """
+    Decode the upload line by line while it is read in chunks.
+    Lines that are not valid text are counted as malformed and dropped.
+    """
+    for line in file:
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            result.malformed += 1
+
+
+def _rows(file, result):
+    """ Yield (title, body) pairs of the `title,body` csv format """
+    csv_reader = csv.reader(_decode_lines(file, result), quotechar='"')
+    while True:
+        try:
+            row = next(csv_reader)
+        except StopIteration:
+            return
+        except csv.Error:
+            result.malformed += 1
+            continue
+        if not row:  # empty line
+            continue
+        title = row[0]
+        if len(row) < 2 or not title.strip() or len(title) > TITLE_MAX_LENGTH:
+            result.malformed += 1
+            continue
+        yield title, row[1]
+
+
+def _taken_titles(blog_id, batch):
+    return set(Entry.objects.filter(blog_id=blog_id, title_hash__in=batch.keys())
+                            .values_list('title_hash', flat=True))
+
+
+def _save_batch(blog_id, batch, result):
+    """
+    Insert the entries of the batch whose titles are not taken in the blog.
+    A title taken meanwhile by another writer fails the unique constraint
+    of Entry, the batch is then checked again. Any other IntegrityError is
+    raised.
+    """
+    existing = _taken_titles(blog_id, batch)
+    for attempt in range(SAVE_BATCH_ATTEMPTS):
+        entries = [Entry(blog_id=blog_id, title=title, body_text=body, title_hash=key)
+                   for key, (title, body) in batch.items() if key not in existing]
+        # the select stays outside: on sqlite a read transaction that later
+        # writes fails at once with "database is locked" under concurrent imports
+        try:
+            with transaction.atomic():
+                Entry.objects.bulk_create(entries)
+                # bulk_create sends no post_save, do what blogs.signals would
+                adjust_tag_entry_counts(len(entries), blog_ids=[blog_id])
+                if entries:
+                    adjust_blog_counters(blog_id=blog_id, entries=len(entries),
+                                         pub_date=max(entry.pub_date for entry in entries))
+                    invalidate_feed()
+        except IntegrityError:
+            taken = _taken_titles(blog_id, batch)
+            if taken <= existing or attempt == SAVE_BATCH_ATTEMPTS - 1:
+                raise
+            existing = taken
+        else:
+            break
+    result.created += len(entries)
+    result.skipped += len(existing)
+
+
+def import_entries(file, blog_id, batch_size=1000, progress=None):
+    """
+    Stream entries from a csv file of `title,body` rows into the blog.
+    Entries whose title already exists in the blog are skipped, as are
+    repeated titles in the file. Each batch costs one indexed select and
+    one insert.
+    `progress` is called with the running ImportResult after each batch.
+    Raises Blog.DoesNotExist for an unknown blog.
+    """
+    if not Blog.objects.filter(pk=blog_id).exists():
+        raise Blog.DoesNotExist(f'No blog with id {blog_id}')
+    result = ImportResult()
+    batch = {}
+    for title, body in _rows(file, result):
+        key = title_hash(title)
+        if key in batch:
+            result.skipped += 1
+            continue
+        batch[key] = title, body
+        if len(batch) >= batch_size:
+            _save_batch(blog_id, batch, result)
+            batch = {}
+            if progress:
+                progress(result)
+    if batch:
+        _save_batch(blog_id, batch, result)
+    return result
+
+
+def claimable_jobs(stale_before=None):
+    """
+    Pending jobs, and the running jobs whose last heartbeat is older than
+    stale_before: their worker died, they are run again (rows already
+    imported are skipped)
+    """
+    claimable = Q(status=ImportJob.PENDING)
+    if stale_before:
+        claimable |= Q(status=ImportJob.RUNNING, heartbeat_at__lt=stale_before)
+    return ImportJob.objects.filter(claimable)
+
+
+def claim_import_job(job_id, stale_before=None):
+    """ Mark a claimable job as running, False if another worker got it first """
+    now = timezone.now()
+    return bool(claimable_jobs(stale_before).filter(pk=job_id)
+                .update(status=ImportJob.RUNNING, started_at=now, heartbeat_at=now))
+
+
+def run_import_job(job_id):
+    """ Import the file of a claimed job, recording progress on the job row """
+    job = ImportJob.objects.get(pk=job_id)
+    jobs = ImportJob.objects.filter(pk=job_id)
+
+    def progress(result):
+        jobs.update(created=result.created, skipped=result.skipped,
+                    malformed=result.malformed, heartbeat_at=timezone.now())
+
+    try:
+        with job.file.open('rb') as file:
+            result = import_entries(file, job.blog_id, progress=progress)
+    except Exception as exc:
+        jobs.update(status=ImportJob.FAILED, error=repr(exc), finished_at=timezone.now())
+        raise
+    jobs.update(status=ImportJob.DONE, created=result.created, skipped=result.skipped,
+                malformed=result.malformed, finished_at=timezone.now())
+    job.file.delete(save=False)
+    return result
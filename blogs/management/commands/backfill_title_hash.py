@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from blogs.models import Entry, title_hash
+
+
+class Command(BaseCommand):
+    help = 'Fill Entry.title_hash for entries saved before the column existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = duplicates = last_id = 0
+        while True:
+            entries = list(Entry.objects.filter(title_hash='', id__gt=last_id)
+                           .only('blog_id', 'title').order_by('id')[:batch_size])
+            if not entries:
+                break
+            last_id = entries[-1].id
+            for entry in entries:
+                entry.title_hash = title_hash(entry.title)
+            taken = set(Entry.objects.filter(blog_id__in={entry.blog_id for entry in entries},
+                                             title_hash__in={entry.title_hash for entry in entries})
+                        .values_list('blog_id', 'title_hash'))
+            # legacy titles differing only in case or spacing would break
+            # entry_unique_title: the oldest entry gets the hash, the others
+            # keep an empty one, which the constraint does not cover
+            hashed = []
+            for entry in entries:
+                if (entry.blog_id, entry.title_hash) in taken:
+                    self.stderr.write(f'entry #{entry.id} repeats a title in blog '
+                                      f'#{entry.blog_id}, left without a hash')
+                    duplicates += 1
+                    continue
+                taken.add((entry.blog_id, entry.title_hash))
+                hashed.append(entry)
+            Entry.objects.bulk_update(hashed, ['title_hash'])
+            updated += len(hashed)
+        self.stdout.write(f'{updated} entries updated, {duplicates} duplicate titles skipped')
@@ -0,0 +1,181 @@
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from django.test import Client
+from django.urls import reverse
+from .benchmark_views import Command as BenchmarkViewsCommand
+
+SERVERS = ('wsgi', 'asgi')
+
+
+class Command(BenchmarkViewsCommand):
+    help = ('Compare the throughput of the read pages at many concurrent clients '
+            'under WSGI, a thread per client and the sync views, and under ASGI, '
+            'one event loop and the async views. Each server runs in its own '
+            'process and prints requests per second and latency percentiles as JSON')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--clients', type=int, default=100,
+                            help='concurrent clients, each sends its requests one by one')
+        parser.add_argument('--server', choices=SERVERS,
+                            help='only run this server, in this process')
+        parser.set_defaults(requests=1000, routes=['main', 'entry-list', 'detail-entry'])
+
+    def urls(self, user, options):
+        kwargs, query_strings = self.route_args(user)
+        urls = []
+        for pattern in self.routes(options):
+            route_kwargs = kwargs.get(pattern.name, {})
+            if route_kwargs is not None:
+                urls.append(reverse(pattern.name, kwargs=route_kwargs)
+                            + query_strings.get(pattern.name, ''))
+        if not urls:
+            raise CommandError('no route to request')
+        return urls
+
+    def environ(self, url, cookie, host):
+        parts = urlsplit(url)
+        return {
+            'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query, 'SERVER_NAME': host, 'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': host, 'HTTP_COOKIE': cookie,
+            'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr, 'wsgi.multithread': True,
+            'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+
+    def scope(self, url, cookie, host):
+        parts = urlsplit(url)
+        return {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'root_path': '', 'path': parts.path,
+            'query_string': parts.query.encode(),
+            'headers': [(b'host', host.encode()), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 50000), 'server': (host, 80),
+        }
+
+    def run_wsgi(self, requests, cookie, host, clients):
+        handler = WSGIHandler()
+
+        def get(url):
+            statuses = []
+            start = time.perf_counter()
+            body = handler(self.environ(url, cookie, host),
+                           lambda status, headers, exc_info=None: statuses.append(status))
+            try:
+                b''.join(body)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            return time.perf_counter() - start, int(statuses[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            return list(pool.map(get, requests))
+
+    def run_asgi(self, requests, cookie, host, clients):
+        handler = ASGIHandler()
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def get(url):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+            start = time.perf_counter()
+            await handler(self.scope(url, cookie, host), receive, send)
+            return time.perf_counter() - start, messages[0]['status']
+
+        async def client(queue, results):
+            while queue:
+                results.append(await get(queue.popleft()))
+
+        async def main():
+            queue, results = deque(requests), []
+            await asyncio.gather(*(client(queue, results) for _ in range(clients)))
+            return results
+
+        return asyncio.run(main())
+
+    def run_server(self, server, options):
+        """ Serve --requests requests per view to --clients clients in this process """
+        user = self.get_user(options)
+        login = Client()
+        login.force_login(user)
+        session = login.cookies[settings.SESSION_COOKIE_NAME].value
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session}'
+        urls = self.urls(user, options)
+        run = self.run_wsgi if server == 'wsgi' else self.run_asgi
+        run(urls * options['warmup'], cookie, options['host'], options['clients'])
+        requests = urls * options['requests']
+        start = time.perf_counter()
+        results = run(requests, cookie, options['host'], options['clients'])
+        seconds = time.perf_counter() - start
+        latencies = [duration * 1000 for duration, status in results]
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        return {
+            'server': server,
+            'async_views': settings.ASYNC_READ_VIEWS,
+            'urls': urls,
+            'clients': options['clients'],
+            'requests': len(results),
+            'errors': sum(status != 200 for duration, status in results),
+            'seconds': round(seconds, 3),
+            'requests_per_second': round(len(results) / seconds, 1),
+            'p50_ms': round(percentiles[49], 3),
+            'p95_ms': round(percentiles[94], 3),
+            'p99_ms': round(percentiles[98], 3),
+        }
+
+    def run_process(self, server, options):
+        """ Run one server in a new process, with the views it is meant to serve """
+        args = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_servers',
+                '--server', server, '--clients', str(options['clients']),
+                '--requests', str(options['requests']), '--warmup', str(options['warmup']),
+                '--host', options['host'], '--routes', *options['routes']]
+        if options['username']:
+            args += ['--username', options['username']]
+        env = {**os.environ, 'ASYNC_READ_VIEWS': '1' if server == 'asgi' else '0'}
+        process = subprocess.run(args, env=env, stdout=subprocess.PIPE, text=True)
+        if process.returncode:
+            raise CommandError(f'the {server} run failed')
+        return json.loads(process.stdout)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2 or options['clients'] < 1:
+            raise CommandError('--requests must be at least 2 and --clients at least 1')
+        if options['server']:
+            report = self.run_server(options['server'], options)
+        else:
+            results = {}
+            for server in SERVERS:
+                results[server] = self.run_process(server, options)
+                self.stderr.write(f'{server}: {results[server]["requests_per_second"]} '
+                                  f'requests/s, p99 {results[server]["p99_ms"]} ms')
+            report = {
+                'clients': options['clients'],
+                'servers': results,
+                'asgi_to_wsgi': round(results['asgi']['requests_per_second']
+                                      / results['wsgi']['requests_per_second'], 3),
+            }
+        report = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
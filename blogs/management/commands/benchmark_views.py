@@ -0,0 +1,152 @@
+import json
+import statistics
+import time
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, reverse
+from blogs import urls as blogs_urls
+from blogs.models import Blog, ImportJob, Tag
+from users import urls as users_urls
+
+
+class QueryTimer:
+    """ Count the queries and add up their time, see connection.execute_wrapper """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class Command(BaseCommand):
+    help = ('Request every named view of the blogs and users apps through the test '
+            'client and print the latency percentiles and SQL per view as JSON')
+
+    # signing out in the middle would spoil the rest of the run
+    skipped_routes = {'logout'}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='measured requests per view')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--username', help='user to sign in as, by default the owner '
+                                               'of the blog with the most entries')
+        parser.add_argument('--host', default='localhost', help='must be in ALLOWED_HOSTS')
+        parser.add_argument('--routes', nargs='*', help='only these route names')
+        parser.add_argument('--output', help='write the JSON to this file')
+
+    def get_user(self, options):
+        user_model = get_user_model()
+        if options['username']:
+            try:
+                return user_model.objects.get(username=options['username'])
+            except user_model.DoesNotExist:
+                raise CommandError(f'no user {options["username"]}')
+        blog = Blog.objects.order_by('-entry_count').select_related('user').first()
+        if blog is None:
+            raise CommandError('no blogs, run seed_data first')
+        return blog.user
+
+    def route_args(self, user):
+        """ Arguments and query strings of the routes, from the data of the user """
+        blog = user.blogs.order_by('id').first()
+        entry = blog.entries.order_by('-pub_date', 'id').first() if blog else None
+        tag = Tag.objects.filter(entry_count__gt=0).first()
+        job = ImportJob.objects.filter(blog=blog).first() if blog else None
+        profile = getattr(user, 'profiles', None)
+        blog_kwargs = {'pk': blog.pk} if blog else None
+        entry_kwargs = {'pk': entry.pk} if entry else None
+        kwargs = {
+            'blog-edit': blog_kwargs,
+            'entry-list': blog_kwargs,
+            'upload-entry': blog_kwargs,
+            'export-entries': blog_kwargs,
+            'blog-rss': blog_kwargs,
+            'blog-atom': blog_kwargs,
+            'create-entry': blog_kwargs,
+            'import-status': {'pk': blog.pk, 'job_id': job.pk} if job else None,
+            'detail-entry': entry_kwargs,
+            'edit-entry': entry_kwargs,
+            'tag-feed': {'name': tag.name} if tag else None,
+            'api-blog': blog_kwargs,
+            'api-blog-entries': blog_kwargs,
+            'api-entry': entry_kwargs,
+            'profile-edit': {'pk': profile.pk} if profile else None,
+        }
+        query_strings = {'search': '?q=' + (entry.title.split()[0] if entry else 'blog')}
+        return kwargs, query_strings
+
+    def routes(self, options):
+        for module in (blogs_urls, users_urls):
+            for pattern in module.urlpatterns:
+                if not isinstance(pattern, URLPattern) or not pattern.name:
+                    continue
+                if pattern.name in self.skipped_routes:
+                    continue
+                if options['routes'] and pattern.name not in options['routes']:
+                    continue
+                yield pattern
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        latencies, query_counts, sql_times = [], [], []
+        status = None
+        for _ in range(options['requests']):
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                start = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latencies.append((time.perf_counter() - start) * 1000)
+            status = response.status_code
+            query_counts.append(timer.count)
+            sql_times.append(timer.seconds * 1000)
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        return {
+            'url': url,
+            'status': status,
+            'p50_ms': round(percentiles[49], 3),
+            'p95_ms': round(percentiles[94], 3),
+            'p99_ms': round(percentiles[98], 3),
+            'queries': statistics.median_low(query_counts),
+            'sql_ms': round(statistics.median(sql_times), 3),
+        }
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2')
+        user = self.get_user(options)
+        client = Client(HTTP_HOST=options['host'])
+        client.force_login(user)
+        kwargs, query_strings = self.route_args(user)
+        results, skipped = {}, []
+        for pattern in self.routes(options):
+            route_kwargs = kwargs.get(pattern.name, {})
+            if route_kwargs is None:
+                skipped.append(pattern.name)
+                continue
+            url = reverse(pattern.name, kwargs=route_kwargs) + query_strings.get(pattern.name, '')
+            results[pattern.name] = self.measure(client, url, options)
+            self.stderr.write(f'{pattern.name}: {results[pattern.name]["p50_ms"]} ms')
+        report = json.dumps({
+            'django': django.get_version(),
+            'user': user.username,
+            'requests': options['requests'],
+            'views': results,
+            'skipped': skipped,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
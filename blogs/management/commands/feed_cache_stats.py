@@ -0,0 +1,10 @@
+import json
+from django.core.management.base import BaseCommand
+from blogs.feed_cache import feed_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Print the hit and miss counters of the feed page cache'
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(feed_cache_stats()))
@@ -0,0 +1,95 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+from blogs.images import make_thumbnail, make_variants, thumbnail_name, variant_targets
+from blogs.models import File
+from users.models import Profile
+from users.views import AVATAR_SIZE
+
+
+def in_batches(queryset, size):
+    """ The rows of the queryset in pk order, read by a query per `size` rows """
+    last = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last).order_by('pk')[:size])
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1].pk
+
+
+class Command(BaseCommand):
+    help = ('Make the resized variants of existing entry images and the '
+            'small copies of existing avatars')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='remake the copies of images that already have them')
+        parser.add_argument('--processes', type=int,
+                            default=settings.IMAGE_VARIANT_PROCESSES or 1)
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='images read, resized and saved at a time')
+
+    def run(self, pool, jobs, fields, batch_size):
+        """
+        Run the (instance, work, args, apply) jobs and bulk save the instances,
+        a batch at a time, so the pending futures do not grow with the table
+        """
+        done = failed = 0
+        jobs = iter(jobs)
+        while True:
+            batch = list(islice(jobs, batch_size))
+            if not batch:
+                return done, failed
+            futures = {pool.submit(work, *args): (instance, apply)
+                       for instance, work, args, apply in batch}
+            updated = []
+            for future in as_completed(futures):
+                instance, apply = futures[future]
+                try:
+                    apply(instance, future.result())
+                except (OSError, Image.DecompressionBombError) as exc:
+                    failed += 1
+                    self.stderr.write(str(exc))
+                    continue
+                updated.append(instance)
+            if updated:
+                type(updated[0]).objects.bulk_update(updated, fields)
+                done += len(updated)
+
+    def file_jobs(self, options):
+        files = File.objects.only('file')
+        widths = settings.IMAGE_VARIANT_WIDTHS
+        if not options['all']:
+            # images no wider than the smallest variant never get one
+            files = files.filter(variants=[]).exclude(width__lte=min(widths))
+
+        def apply(item, result):
+            (item.width, item.height), item.variants = result
+
+        for item in in_batches(files, options['batch_size']):
+            yield item, make_variants, (item.file.path, variant_targets(item.file, widths)), apply
+
+    def avatar_jobs(self, options):
+        profiles = Profile.objects.exclude(avatar='').only('avatar')
+        if not options['all']:
+            profiles = profiles.filter(avatar_thumb='')
+
+        def apply(profile, result):
+            profile.avatar_thumb = thumbnail_name(profile.avatar.name, AVATAR_SIZE)
+
+        for profile in in_batches(profiles, options['batch_size']):
+            avatar = profile.avatar
+            target = avatar.storage.path(thumbnail_name(avatar.name, AVATAR_SIZE))
+            yield profile, make_thumbnail, (avatar.path, target, AVATAR_SIZE), apply
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            done, failed = self.run(pool, self.file_jobs(options),
+                                    ['width', 'height', 'variants'], options['batch_size'])
+            self.stdout.write(f'{done} images done, {failed} failed')
+            done, failed = self.run(pool, self.avatar_jobs(options), ['avatar_thumb'],
+                                    options['batch_size'])
+            self.stdout.write(f'{done} avatars done, {failed} failed')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from blog_platform.storage import blob_references, blob_storage, is_immutable
+from blogs.models import File
+from users.models import Profile
+
+# the resized copies are named after the original, they are made again
+# for the new names by make_image_variants
+FIELDS = [
+    (File, 'file', {'variants': []}),
+    (Profile, 'avatar', {'avatar_thumb': ''}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Move files uploaded before the content-addressed storage into it, merging duplicates'
+
+    def handle(self, *args, **options):
+        for model, field, resets in FIELDS:
+            moved = 0
+            rows = model.objects.exclude(**{field: ''}).only(field)
+            for row in rows.iterator(chunk_size=500):
+                old_name = getattr(row, field).name
+                if is_immutable(old_name) or not blob_storage.exists(old_name):
+                    continue
+                with blob_storage.open(old_name) as content:
+                    new_name = blob_storage.save(old_name, content)
+                model.objects.filter(pk=row.pk).update(**{field: new_name}, **resets)
+                if not blob_references(old_name):
+                    blob_storage.delete(old_name)
+                moved += 1
+            self.stdout.write(f'{model._meta.label}.{field}: {moved} files moved')
+        self.stdout.write('run make_image_variants to make the resized copies')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+from blogs.search import rebuild_search_index, search_supported
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of entries from scratch'
+
+    def handle(self, *args, **options):
+        if not search_supported():
+            raise CommandError('full-text search needs the sqlite backend')
+        indexed = rebuild_search_index()
+        self.stdout.write(f'{indexed} entries indexed')
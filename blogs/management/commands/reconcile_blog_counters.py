@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from blogs.models import Blog, Entry, File
+
+
+def _count(queryset, group):
+    return Subquery(queryset.order_by().values(group).annotate(count=Count('id'))
+                    .values('count'), output_field=IntegerField())
+
+
+class Command(BaseCommand):
+    help = ('Recount the entries, files and last publication date of the blogs whose '
+            'counters drifted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='only report the drift')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        real = {
+            'real_entries': Coalesce(_count(Entry.objects.filter(blog=OuterRef('pk')), 'blog'), 0),
+            'real_files': Coalesce(_count(File.objects.filter(entry__blog=OuterRef('pk')),
+                                          'entry__blog'), 0),
+            'real_last': Subquery(Entry.objects.filter(blog=OuterRef('pk'))
+                                  .order_by('-pub_date').values('pub_date')[:1]),
+        }
+        in_step = (Q(entry_count=F('real_entries')) & Q(file_count=F('real_files'))
+                   & (Q(last_pub_date=F('real_last'))
+                      | Q(last_pub_date__isnull=True, real_last__isnull=True)))
+        drifted = list(Blog.objects.annotate(**real).exclude(in_step)
+                       .values_list('pk', flat=True))
+        self.stdout.write(f'{len(drifted)} blogs drifted')
+        if options['dry_run']:
+            return
+        size = options['batch_size']
+        for start in range(0, len(drifted), size):
+            with transaction.atomic():
+                Blog.objects.filter(pk__in=drifted[start:start + size]).update(
+                    entry_count=real['real_entries'], file_count=real['real_files'],
+                    last_pub_date=real['real_last'])
+        self.stdout.write(f'{len(drifted)} blogs repaired')
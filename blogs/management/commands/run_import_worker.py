@@ -0,0 +1,89 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from blogs.importers import claim_import_job, claimable_jobs, run_import_job
+
+
+def _init_process():
+    # children must not share the parent's database connections
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run queued entry imports, several jobs at once in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.ENTRY_IMPORT_PROCESSES,
+                            help='size of the process pool, 0 runs the jobs in this process')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='exit once the queue is drained')
+        parser.add_argument('--stale-after', type=float, default=settings.ENTRY_IMPORT_STALE_AFTER,
+                            help='seconds without progress after which a running job is '
+                                 'taken to have lost its worker and is run again')
+
+    def claim_jobs(self, limit, running=()):
+        """ Claim up to `limit` pending or stale jobs, oldest first """
+        claimed = []
+        stale_before = timezone.now() - timedelta(seconds=self.stale_after)
+        pending = claimable_jobs(stale_before).exclude(pk__in=running).values_list('id', flat=True)
+        for job_id in pending[:limit]:
+            if claim_import_job(job_id, stale_before):
+                claimed.append(job_id)
+        return claimed
+
+    def report(self, job_id, result=None, error=None):
+        if error:
+            self.stderr.write(f'import #{job_id} failed: {error!r}')
+        else:
+            self.stdout.write(f'import #{job_id} done: {result.created} created, '
+                              f'{result.skipped} skipped, {result.malformed} malformed')
+
+    def run_inline(self, options):
+        while True:
+            job_ids = self.claim_jobs(1)
+            if not job_ids:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            try:
+                self.report(job_ids[0], run_import_job(job_ids[0]))
+            except Exception as exc:
+                self.report(job_ids[0], error=exc)
+
+    def run_pool(self, options):
+        processes = options['processes']
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_process) as pool:
+            running = {}
+            while True:
+                for job_id in self.claim_jobs(processes - len(running), list(running.values())):
+                    running[pool.submit(run_import_job, job_id)] = job_id
+                if not running:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+                done, _ = wait(running, timeout=options['poll_interval'],
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    if future.exception():
+                        self.report(job_id, error=future.exception())
+                    else:
+                        self.report(job_id, future.result())
+
+    def handle(self, *args, **options):
+        self.stale_after = options['stale_after']
+        if options['processes'] > 0:
+            self.run_pool(options)
+        else:
+            self.run_inline(options)
@@ -0,0 +1,139 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from PIL import Image
+from blog_platform.storage import blob_storage
+from blogs.feed_cache import invalidate_feed
+from blogs.images import make_variants, variant_targets
+from blogs.models import Blog, Entry, File, title_hash
+from users.models import Profile
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+         'incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud '
+         'exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute irure '
+         'in reprehenderit voluptate velit esse cillum fugiat nulla pariatur excepteur sint '
+         'occaecat cupidatat non proident sunt culpa qui officia deserunt mollit anim id est '
+         'django python sqlite index cache query feed blog entry image profile').split()
+
+TAGS = ('python', 'django', 'travel', 'food', 'music', 'books', 'sport', 'photo',
+        'news', 'science', 'games', 'movies', 'design', 'linux', 'garden', 'cars')
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with generated users, blogs, entries and images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--blogs-per-user', type=int, default=2)
+        parser.add_argument('--entries-per-blog', type=int, default=50)
+        parser.add_argument('--files-per-entry', type=float, default=0.5,
+                            help='average number of images of an entry')
+        parser.add_argument('--images', type=int, default=20,
+                            help='distinct images, the files share them')
+        parser.add_argument('--body-size', type=int, default=3000,
+                            help='median length of an entry text in characters')
+        parser.add_argument('--days', type=int, default=365,
+                            help='entries are published over this many past days')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def text(self, size):
+        words = []
+        length = 0
+        while length < size:
+            word = random.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words).capitalize() + '.'
+
+    def body_size(self, median):
+        # entry lengths are skewed: most are short, a few are very long
+        return max(50, int(random.lognormvariate(0, 0.8) * median))
+
+    def make_images(self, count):
+        """ (name, width, height, variants) of count generated images in the blob storage """
+        images = []
+        for _ in range(count):
+            size = random.choice([(1600, 1200), (1200, 800), (800, 800), (640, 480)])
+            buffer = BytesIO()
+            color = tuple(random.randrange(256) for _ in range(3))
+            Image.new('RGB', size, color).save(buffer, 'JPEG', quality=85)
+            name = blob_storage.save('files/seed.jpg', ContentFile(buffer.getvalue()))
+            field_file = File(file=name).file
+            _, written = make_variants(field_file.path,
+                                       variant_targets(field_file, settings.IMAGE_VARIANT_WIDTHS))
+            images.append((name, size[0], size[1], written))
+        return images
+
+    def create_users(self, options):
+        user_model = get_user_model()
+        start = user_model.objects.filter(username__startswith='seed_').count()
+        # one hash for everybody, hashing is slow on purpose
+        password = make_password(options['password'])
+        users = [user_model(username=f'seed_{start + number}', password=password,
+                            first_name=random.choice(WORDS).capitalize(),
+                            last_name=random.choice(WORDS).capitalize())
+                 for number in range(options['users'])]
+        users = user_model.objects.bulk_create(users, batch_size=options['batch_size'])
+        Profile.objects.bulk_create([Profile(user=user) for user in users],
+                                    batch_size=options['batch_size'])
+        return users
+
+    def create_blogs(self, users, options):
+        blogs = [Blog(user=user, name=self.text(30)[:100],
+                      tags=', '.join(random.sample(TAGS, random.randint(1, 3))))
+                 for user in users for _ in range(options['blogs_per_user'])]
+        return Blog.objects.bulk_create(blogs, batch_size=options['batch_size'])
+
+    def save_entries(self, entries, images, options):
+        entries = Entry.objects.bulk_create(entries)
+        # pub_date is auto_now_add, the spread over the past is set afterwards
+        now = timezone.now()
+        for entry in entries:
+            entry.pub_date = now - timedelta(seconds=random.randrange(options['days'] * 86400))
+            entry.mod_date = entry.pub_date
+        Entry.objects.bulk_update(entries, ['pub_date', 'mod_date'])
+        files = []
+        for entry in entries:
+            count = int(random.expovariate(1 / options['files_per_entry'])) if images else 0
+            for name, width, height, variants in random.sample(images, min(count, len(images))):
+                files.append(File(entry=entry, file=name, description=self.text(40),
+                                  width=width, height=height, variants=variants))
+        File.objects.bulk_create(files)
+        return len(files)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        batch_size = options['batch_size']
+        images = self.make_images(options['images']) if options['files_per_entry'] else []
+        users = self.create_users(options)
+        blogs = self.create_blogs(users, options)
+        entry_count = file_count = 0
+        batch = []
+        for blog in blogs:
+            for _ in range(options['entries_per_blog']):
+                title = f'{self.text(40)[:-1]} {entry_count + len(batch)}'
+                batch.append(Entry(blog=blog, title=title, title_hash=title_hash(title),
+                                   body_text=self.text(self.body_size(options['body_size']))))
+                if len(batch) >= batch_size:
+                    file_count += self.save_entries(batch, images, options)
+                    entry_count += len(batch)
+                    batch = []
+        if batch:
+            file_count += self.save_entries(batch, images, options)
+            entry_count += len(batch)
+        # bulk_create sends no signals: link the tags, count their entries
+        # and set the counters of the blogs
+        call_command('sync_blog_tags', stdout=self.stdout)
+        call_command('reconcile_blog_counters', stdout=self.stdout)
+        invalidate_feed()
+        self.stdout.write(f'{len(users)} users, {len(blogs)} blogs, {entry_count} entries, '
+                          f'{file_count} files created, password "{options["password"]}"')
@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.db.backends.sqlite3.base import DatabaseWrapper as DefaultWrapper
+from blog_platform.sqlite.base import DatabaseWrapper as ProductionWrapper
+
+PROFILES = {'default': DefaultWrapper, 'production': ProductionWrapper}
+
+
+def open_database(wrapper_class, name):
+    return wrapper_class({
+        'ENGINE': '', 'NAME': name, 'OPTIONS': {}, 'TIME_ZONE': None,
+        'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True,
+        'ATOMIC_REQUESTS': False, 'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+        'TEST': {},
+    }, alias=f'load-{threading.get_ident()}')
+
+
+def run_load(wrapper_class, name, writers, readers, transactions):
+    """
+    Writers run transactions that read and then insert, the pattern of the
+    imports and of the entry form, while readers count the rows. Returns
+    the failed transactions, the write rate and the read latencies.
+    """
+    setup = open_database(wrapper_class, name)
+    with setup.cursor() as cursor:
+        cursor.execute('CREATE TABLE IF NOT EXISTS item (id INTEGER PRIMARY KEY, body TEXT)')
+    setup.close()
+    write_errors, read_errors = [], []
+    read_times = []
+    done = threading.Event()
+
+    def write():
+        database = open_database(wrapper_class, name)
+        for number in range(transactions):
+            # what transaction.atomic() does on sqlite
+            database.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+            try:
+                with database.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM item')
+                    cursor.execute('INSERT INTO item (body) VALUES (%s)', ['x' * 2000])
+                database.commit()
+            except OperationalError as exc:
+                database.rollback()
+                write_errors.append(str(exc))
+            finally:
+                database.set_autocommit(True)
+        database.close()
+
+    def read():
+        database = open_database(wrapper_class, name)
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                with database.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM item')
+                    cursor.fetchone()
+            except OperationalError as exc:
+                read_errors.append(str(exc))
+            read_times.append((time.perf_counter() - start) * 1000)
+        database.close()
+
+    writer_threads = [threading.Thread(target=write) for _ in range(writers)]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    start = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+    committed = writers * transactions - len(write_errors)
+    percentiles = statistics.quantiles(read_times, n=100) if len(read_times) > 1 else [0] * 99
+    return {
+        'failed_writes': len(write_errors),
+        'failed_reads': len(read_errors),
+        'writes_per_second': round(committed / elapsed, 1),
+        'reads': len(read_times),
+        'read_p50_ms': round(percentiles[49], 3),
+        'read_p99_ms': round(percentiles[98], 3),
+        'read_max_ms': round(max(read_times, default=0), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Run concurrent writers and readers against a temporary sqlite file with the '
+            'default backend and with the SQLITE_PRODUCTION one, and print the results as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--transactions', type=int, default=50,
+                            help='transactions of each writer')
+        parser.add_argument('--profiles', nargs='*', default=list(PROFILES), choices=list(PROFILES))
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in options['profiles']:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'load.sqlite3')
+                results[profile] = run_load(PROFILES[profile], path, options['writers'],
+                                            options['readers'], options['transactions'])
+        self.stdout.write(json.dumps(results, indent=2))
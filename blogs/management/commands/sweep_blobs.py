@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from blog_platform.storage import blob_names, collect_blob
+
+
+class Command(BaseCommand):
+    help = ('Delete the blobs no row points at that no upload reused for the grace period, '
+            'run it from cron')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=float, default=settings.BLOB_GC_GRACE,
+                            help='seconds a blob is kept after its last reuse')
+
+    def handle(self, *args, **options):
+        deleted = sum(collect_blob(name, options['grace']) for name in list(blob_names()))
+        self.stdout.write(f'{deleted} blobs deleted')
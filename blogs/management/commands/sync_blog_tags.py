@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from blogs.models import Blog, Entry, Tag
+
+
+class Command(BaseCommand):
+    help = 'Create tags from the Blog.tags strings and recount the entries of every tag'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for blog in Blog.objects.only('tags').iterator(chunk_size=2000):
+                blog.sync_tags()
+            counts = (Entry.objects.filter(blog__tag_set=OuterRef('pk'))
+                      .order_by().values('blog__tag_set').annotate(count=Count('id'))
+                      .values('count'))
+            Tag.objects.update(entry_count=Coalesce(Subquery(counts), 0))
+        self.stdout.write(f'{Tag.objects.count()} tags synced')
@@ -0,0 +1,33 @@
+import os
+import sqlite3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Copy the sqlite default database over the sqlite replicas of '
+            'REPLICA_DATABASES, to try the replica routing locally')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('no replicas, set DB_REPLICAS')
+        source_name = connections['default'].settings_dict['NAME']
+        for alias in settings.REPLICA_DATABASES:
+            connection = connections[alias]
+            if connection.vendor != 'sqlite':
+                raise CommandError(f'{alias} is not a sqlite database')
+            target_name = str(connection.settings_dict['NAME'])
+            connection.close()
+            # a consistent copy even while the site writes, swapped in at once:
+            # open connections keep reading the old file until they close
+            tmp_name = f'{target_name}.tmp'
+            source = sqlite3.connect(source_name)
+            target = sqlite3.connect(tmp_name)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            os.replace(tmp_name, target_name)
+            self.stdout.write(f'{alias}: copied to {target_name}')
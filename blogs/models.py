@@ -1,6 +1,76 @@
+import hashlib
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, Greatest, Substr
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from blog_platform.storage import blob_storage
+from .images import variant_name
+
+
+def parse_tags(tags):
+    """ Tag names of a comma separated tag string """
+    names = (' '.join(name.casefold().split()) for name in tags.split(','))
+    return sorted({name for name in names if name})
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True, verbose_name=_('тег'))
+    # entries of all blogs with the tag, kept up to date by blogs.signals
+    entry_count = models.PositiveIntegerField(default=0, db_index=True,
+                                              verbose_name=_('количество статей'))
+
+    class Meta:
+        ordering = ['-entry_count', 'name']
+        verbose_name = _('тег')
+        verbose_name_plural = _('теги')
+
+    def __str__(self):
+        return self.name
+
+
+def adjust_tag_entry_counts(delta, blog_ids=None, tag_ids=None):
+    """ Add delta to the entry count of the tags of the blogs, or of tag_ids """
+    tags = Tag.objects.all()
+    if blog_ids is not None:
+        tags = tags.filter(blogs__in=blog_ids)
+    if tag_ids is not None:
+        tags = tags.filter(pk__in=tag_ids)
+    if delta:
+        tags.update(entry_count=models.F('entry_count') + delta)
+
+
+def counter_plus(field, delta):
+    """ The counter moved by delta, a counter that drifted low stops at 0 """
+    if delta < 0:
+        # the positive field's CHECK would fail the whole delete
+        return Greatest(F(field) + delta, Value(0))
+    return F(field) + delta
+
+
+def adjust_blog_counters(blog_id=None, entry_id=None, entries=0, files=0, pub_date=None):
+    """
+    Add to the counters of the blog, given by its id or by one of its
+    entries, and move last_pub_date forward to pub_date. One F() update,
+    so concurrent changes add up.
+    """
+    changes = {}
+    if entries:
+        changes['entry_count'] = counter_plus('entry_count', entries)
+    if files:
+        changes['file_count'] = counter_plus('file_count', files)
+    if pub_date is not None:
+        changes['last_pub_date'] = Greatest(Coalesce('last_pub_date', Value(pub_date)),
+                                            Value(pub_date))
+    if not changes:
+        return
+    if blog_id is not None:
+        blogs = Blog.objects.filter(pk=blog_id)
+    else:
+        blogs = Blog.objects.filter(entries=entry_id)
+    blogs.update(**changes)
 
 
 class Blog(models.Model):
@@ -8,6 +78,18 @@ class Blog(models.Model):
                              related_name='blogs', verbose_name=_('пользователь'))
     name = models.CharField(max_length=100, verbose_name=_('название блога'))
     tags = models.CharField(max_length=50, verbose_name=_('строка тегов'))
+    tag_set = models.ManyToManyField(Tag, related_name='blogs', blank=True,
+                                     verbose_name=_('теги'))
+    # kept up to date by blogs.signals and the bulk paths, repaired by
+    # `manage.py reconcile_blog_counters`
+    entry_count = models.PositiveIntegerField(default=0, editable=False,
+                                              verbose_name=_('количество статей'))
+    file_count = models.PositiveIntegerField(default=0, editable=False,
+                                             verbose_name=_('количество файлов'))
+    last_pub_date = models.DateTimeField(null=True, blank=True, editable=False,
+                                         verbose_name=_('дата последней публикации'))
+
+    counter_fields = ('entry_count', 'file_count', 'last_pub_date')
 
     class Meta:
         verbose_name = _('блог')
@@ -16,6 +98,51 @@ class Blog(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # the counters loaded with the blog may be stale by now, they are
+            # only changed by F() updates
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key
+                                       and field.name not in self.counter_fields]
+        super().save(*args, **kwargs)
+        self.sync_tags()
+
+    def sync_tags(self):
+        """ Make tag_set match the tag string """
+        names = parse_tags(self.tags)
+        current = {tag.name: tag for tag in self.tag_set.all()}
+        if set(current) == set(names):
+            return
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        self.tag_set.set(Tag.objects.filter(name__in=names))
+
+
+def title_hash(title):
+    """ Dedup key of an entry title: case and whitespace insensitive """
+    normalized = ' '.join(title.casefold().split())
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+class EntryQuerySet(models.QuerySet):
+    excerpt_length = 100
+
+    def feed(self):
+        """ Columns used by the main feed, author joined in the same query """
+        return self.select_related('blog__user').only(
+            'title', 'pub_date', 'blog', 'blog__user', 'blog__user__username',
+            'blog__user__first_name', 'blog__user__last_name',
+        ).annotate(excerpt=Substr('body_text', 1, self.excerpt_length))
+
+    def listing(self):
+        """ Columns used by the entry list of a blog """
+        # blog is kept: the related manager reads it to attach the blog
+        return self.only('blog', 'title', 'pub_date', 'mod_date')
+
+    def with_title(self, blog_id, title):
+        """ Entries of the blog with the same title, an indexed lookup """
+        return self.filter(blog_id=blog_id, title_hash=title_hash(title))
+
 
 class Entry(models.Model):
     blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name='entries',
@@ -24,12 +151,37 @@ class Entry(models.Model):
     body_text = models.TextField(verbose_name=_('содержание'))
     pub_date = models.DateTimeField(auto_now_add=True)
     mod_date = models.DateTimeField(auto_now_add=True)
+    title_hash = models.CharField(max_length=32, editable=False)
+
+    objects = EntryQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.title_hash = title_hash(self.title)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'title_hash'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date', 'id']
+        indexes = [
+            # keyset pagination of the main feed and of the blog entry lists
+            models.Index(fields=['-pub_date', 'id'], name='entry_feed_idx'),
+            models.Index(fields=['blog', '-pub_date', 'id'], name='entry_blog_feed_idx'),
+            # ETag of the blog pages
+            models.Index(fields=['blog', '-mod_date'], name='entry_blog_mod_idx'),
+            # title deduplication within a blog
+            models.Index(fields=['blog', 'title_hash'], name='entry_title_hash_idx'),
+        ]
+        constraints = [
+            # backs up the title checks of the views and of the importer;
+            # entries saved before title_hash existed have none yet
+            models.UniqueConstraint(fields=['blog', 'title_hash'], condition=~Q(title_hash=''),
+                                    name='entry_unique_title'),
+        ]
         verbose_name = _('статья')
         verbose_name_plural = _('статьи')
 
@@ -37,8 +189,13 @@ class Entry(models.Model):
 class File(models.Model):
     entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name='files',
                               verbose_name=_('статья'))
-    file = models.ImageField(upload_to='files/', verbose_name=_('файл'))
+    file = models.ImageField(upload_to='files/', storage=blob_storage, db_index=True,
+                             verbose_name=_('файл'))
     description = models.TextField(blank=True, verbose_name=_('описание'))
+    # filled from the upload or by the variant pipeline, see blogs.images
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    variants = models.JSONField(default=list, blank=True, editable=False)
 
     class Meta:
         verbose_name = _('файл')
@@ -46,3 +203,76 @@ class File(models.Model):
 
     def __str__(self):
         return self.description
+
+    def save(self, *args, **kwargs):
+        if self.width is None and self.file and not self.file._committed:
+            # a fresh upload is still in memory, reading its size is cheap
+            try:
+                self.width, self.height = self.file.width, self.file.height
+            except (OSError, TypeError):
+                pass
+        super().save(*args, **kwargs)
+
+    @property
+    def srcset(self):
+        sources = [f'{settings.MEDIA_URL}{variant_name(self.file.name, width)} {width}w'
+                   for width in self.variants]
+        if self.width:
+            sources.append(f'{self.file.url} {self.width}w')
+        return ', '.join(sources)
+
+    @property
+    def display_url(self):
+        """ The smallest variant that still fills the 200px wide figure """
+        widths = [width for width in self.variants if width >= 200]
+        if widths:
+            return f'{settings.MEDIA_URL}{variant_name(self.file.name, min(widths))}'
+        return self.file.url
+
+
+class ImportJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, _('в очереди')),
+        (RUNNING, _('выполняется')),
+        (DONE, _('завершено')),
+        (FAILED, _('ошибка')),
+    ]
+
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name='import_jobs',
+                             verbose_name=_('блог'))
+    file = models.FileField(upload_to='imports/', verbose_name=_('файл'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING,
+                              db_index=True, verbose_name=_('статус'))
+    created = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    malformed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # moved forward by the worker after every batch, see claimable_jobs
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['queued_at']
+        verbose_name = _('загрузка статей')
+        verbose_name_plural = _('загрузки статей')
+
+    def __str__(self):
+        return f'Import #{self.id} of {self.blog_id}: {self.status}'
+
+    @property
+    def processed(self):
+        return self.created + self.skipped + self.malformed
+
+    @property
+    def throughput(self):
+        """ Rows processed per second since the job was started """
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.processed / elapsed, 1) if elapsed > 0 else 0.0
@@ -0,0 +1,194 @@
+import base64
+import binascii
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import gettext as _
+
+
+class KeysetPage:
+    """ One page of a keyset-paginated queryset """
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetStream:
+    """
+    A keyset page read row by row with iterator(), so a large page is never
+    held in memory. The cursors are known once the rows have been read.
+    """
+    def __init__(self, paginator, queryset, chunk_size, has_previous=False, has_next=False):
+        self.paginator = paginator
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.next_cursor = self.previous_cursor = None
+
+    def __iter__(self):
+        count = 0
+        for row in self.queryset.iterator(chunk_size=self.chunk_size):
+            if count == self.paginator.per_page:
+                # the extra row of a next page
+                self.has_next = True
+                break
+            if count == 0 and self.has_previous:
+                self.previous_cursor = self.paginator.encode_cursor('prev', row)
+            count += 1
+            last = row
+            yield row
+        if count and self.has_next:
+            self.next_cursor = self.paginator.encode_cursor('next', last)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over an ordering of the form ('-pub_date', 'id').
+    Each page is a single indexed range query with LIMIT, so page N costs
+    the same as page 1: there is no OFFSET and no COUNT(*).
+    """
+    def __init__(self, queryset, per_page, ordering=('-pub_date', 'id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.key, self.tie = (field.lstrip('-') for field in ordering)
+        self.key_desc = ordering[0].startswith('-')
+
+    def encode_cursor(self, direction, obj):
+        value = [direction, getattr(obj, self.key), getattr(obj, self.tie)]
+        # isoformat keeps the microseconds that DjangoJSONEncoder would drop
+        raw = json.dumps(value, default=lambda o: o.isoformat()).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, key_value, tie_value = json.loads(raw)
+            if direction not in ('next', 'prev'):
+                raise ValueError(direction)
+            model = self.queryset.model
+            key_value = model._meta.get_field(self.key).to_python(key_value)
+            tie_value = model._meta.get_field(self.tie).to_python(tie_value)
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise Http404(_('Неверный курсор страницы'))
+        return direction, key_value, tie_value
+
+    def _after(self, key_value, tie_value):
+        """ Rows that come after (key_value, tie_value) in page order """
+        key_lookup = 'lt' if self.key_desc else 'gt'
+        return (Q(**{f'{self.key}__{key_lookup}': key_value}) |
+                Q(**{self.key: key_value, f'{self.tie}__gt': tie_value}))
+
+    def _before(self, key_value, tie_value):
+        """ Rows that come before (key_value, tie_value) in page order """
+        key_lookup = 'gt' if self.key_desc else 'lt'
+        return (Q(**{f'{self.key}__{key_lookup}': key_value}) |
+                Q(**{self.key: key_value, f'{self.tie}__lt': tie_value}))
+
+    def _orderings(self):
+        forward = ('-' if self.key_desc else '') + self.key, self.tie
+        backward = ('' if self.key_desc else '-') + self.key, '-' + self.tie
+        return forward, backward
+
+    def _query(self, cursor):
+        """ The queryset of the page with one extra row, and its direction """
+        forward, backward = self._orderings()
+        direction = 'next'
+        queryset = self.queryset
+        if cursor:
+            direction, key_value, tie_value = self.decode_cursor(cursor)
+            if direction == 'next':
+                queryset = queryset.filter(self._after(key_value, tie_value))
+            else:
+                queryset = queryset.filter(self._before(key_value, tie_value))
+        # fetch one extra row to know whether there is another page
+        ordering = forward if direction == 'next' else backward
+        return queryset.order_by(*ordering)[:self.per_page + 1], direction
+
+    def _page(self, rows, direction, cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor('next', rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor('prev', rows[0])
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def page(self, cursor=None):
+        queryset, direction = self._query(cursor)
+        return self._page(list(queryset), direction, cursor)
+
+    async def apage(self, cursor=None):
+        queryset, direction = self._query(cursor)
+        return self._page([row async for row in queryset.aiterator()], direction, cursor)
+
+    def stream(self, cursor=None, chunk_size=100):
+        """
+        The page as a KeysetStream, read with iterator() in page order. A
+        previous page is cut at its first row, found by a query of two
+        (key, tie) pairs, so it is not read backwards and reversed.
+        """
+        forward, backward = self._orderings()
+        if not cursor:
+            return KeysetStream(self, self.queryset.order_by(*forward)[:self.per_page + 1],
+                                chunk_size)
+        direction, key_value, tie_value = self.decode_cursor(cursor)
+        if direction == 'next':
+            queryset = self.queryset.filter(self._after(key_value, tie_value))
+            return KeysetStream(self, queryset.order_by(*forward)[:self.per_page + 1],
+                                chunk_size, has_previous=True)
+        queryset = self.queryset.filter(self._before(key_value, tie_value))
+        first = list(queryset.order_by(*backward)
+                     .values_list(self.key, self.tie)[self.per_page - 1:self.per_page + 1])
+        if first:
+            queryset = queryset.filter(self._after(*first[0]) |
+                                       Q(**{self.key: first[0][0], self.tie: first[0][1]}))
+        return KeysetStream(self, queryset.order_by(*forward), chunk_size,
+                            has_previous=len(first) > 1, has_next=True)
+
+
+def paginate_keyset(request, queryset, per_page, cursor_kwarg='cursor'):
+    """ Return the KeysetPage selected by the cursor in the query string """
+    paginator = KeysetPaginator(queryset, per_page)
+    return paginator.page(request.GET.get(cursor_kwarg))
+
+
+async def apaginate_keyset(request, queryset, per_page, cursor_kwarg='cursor'):
+    """ paginate_keyset for async views """
+    paginator = KeysetPaginator(queryset, per_page)
+    return await paginator.apage(request.GET.get(cursor_kwarg))
+
+
+class KeysetPaginationMixin:
+    """
+    Replace the OFFSET based pagination of ListView with keyset pagination.
+    Set `paginate_by` as usual, the page is selected by `?cursor=`.
+    """
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_keyset(self.request, queryset, page_size, self.cursor_kwarg)
+        return None, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,104 @@
+from django.db import connection, connections
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import Entry
+
+ENTRY_TABLE = Entry._meta.db_table
+FTS_TABLE = f'{ENTRY_TABLE}_fts'
+
+# private use characters mark the highlighted terms until the text is escaped
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+# external content table: the text is stored once, in the entry table, and
+# the triggers keep the index in step with every insert, update and delete,
+# including bulk_create and queryset updates that send no model signals
+SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body_text, content='{ENTRY_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body_text)
+        VALUES (new.id, new.title, new.body_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body_text)
+        VALUES ('delete', old.id, old.title, old.body_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, body_text ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body_text)
+        VALUES ('delete', old.id, old.title, old.body_text);
+        INSERT INTO {FTS_TABLE}(rowid, title, body_text)
+        VALUES (new.id, new.title, new.body_text);
+    END""",
+]
+
+
+def search_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_search_index(sender=None, using='default', **kwargs):
+    """ Create the fts table and its triggers, connected to post_migrate """
+    db = connections[using]
+    if not search_supported(db):
+        return
+    with db.cursor() as cursor:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+
+
+def rebuild_search_index():
+    """ Discard the index and rebuild it from the entry table in one pass """
+    with connection.cursor() as cursor:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def match_expression(query):
+    """ Quote every word of the user query, so it is never parsed as fts syntax """
+    terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+    return ' '.join(terms)
+
+
+def _highlighted(text):
+    return mark_safe(escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def search_entries(query, limit=50):
+    """
+    Entries matching the query, best first by bm25 with title matches
+    weighted above body matches. Each entry gets `title_highlight` and
+    `snippet` attributes, safe html with the matched terms in <mark>.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    if not search_supported():
+        entries = list(Entry.objects.feed().filter(Q(title__icontains=query) |
+                                                   Q(body_text__icontains=query))[:limit])
+        for entry in entries:
+            entry.title_highlight, entry.snippet = entry.title, entry.excerpt
+        return entries
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT rowid,
+                       highlight({FTS_TABLE}, 0, %s, %s),
+                       snippet({FTS_TABLE}, 1, %s, %s, '…', 16)
+                FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s
+                ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s""",
+            [MARK_START, MARK_END, MARK_START, MARK_END, expression, limit])
+        rows = cursor.fetchall()
+    entries = Entry.objects.feed().in_bulk([row[0] for row in rows])
+    results = []
+    for entry_id, title, snippet in rows:
+        entry = entries.get(entry_id)
+        if entry is not None:
+            entry.title_highlight = _highlighted(title)
+            entry.snippet = _highlighted(snippet)
+            results.append(entry)
+    return results
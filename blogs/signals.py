@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.db.models import OuterRef, Subquery
+from django.dispatch import receiver
+from blog_platform.storage import release_blob
+from .feed_cache import invalidate_feed
+from .images import schedule_variants
+from .models import (Blog, Entry, File, adjust_blog_counters, adjust_tag_entry_counts,
+                     counter_plus)
+
+AUTHOR_FIELDS = ('username', 'first_name', 'last_name')
+
+
+# incremental per tag entry counts
+@receiver(post_save, sender=Entry)
+def count_created_entry(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_tag_entry_counts(1, blog_ids=[instance.blog_id])
+
+
+@receiver(post_delete, sender=Entry)
+def count_deleted_entry(sender, instance, **kwargs):
+    # when the whole blog is deleted its tag links are already gone here,
+    # the counts were taken off in uncount_deleted_blog
+    adjust_tag_entry_counts(-1, blog_ids=[instance.blog_id])
+
+
+@receiver(pre_delete, sender=Blog)
+def uncount_deleted_blog(sender, instance, **kwargs):
+    adjust_tag_entry_counts(-instance.entries.count(), blog_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Blog)
+def invalidate_feed_on_blog(sender, instance, created, **kwargs):
+    # the rss and atom feeds of the blog show its name
+    if not created:
+        invalidate_feed()
+
+
+@receiver(m2m_changed, sender=Blog.tag_set.through)
+def count_tagged_blog(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    if action != 'post_add':
+        # only the links that exist are removed
+        links = sender.objects.filter(**{'tag_id' if reverse else 'blog_id': instance.pk})
+        if pk_set is not None:
+            links = links.filter(**{'blog_id__in' if reverse else 'tag_id__in': pk_set})
+        pk_set = set(links.values_list('blog_id' if reverse else 'tag_id', flat=True))
+    if reverse:  # tag.blogs changed: one tag, several blogs
+        tag_ids, blog_ids = [instance.pk], pk_set
+    else:  # blog.tag_set changed: one blog, several tags
+        tag_ids, blog_ids = pk_set, [instance.pk]
+    if not pk_set:
+        return
+    count = Entry.objects.filter(blog_id__in=blog_ids).count()
+    adjust_tag_entry_counts(count if action == 'post_add' else -count, tag_ids=tag_ids)
+
+
+# per blog entry and file counters
+
+@receiver(post_save, sender=Entry)
+def count_blog_entry(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_blog_counters(blog_id=instance.blog_id, entries=1, pub_date=instance.pub_date)
+
+
+@receiver(post_delete, sender=Entry)
+def uncount_blog_entry(sender, instance, **kwargs):
+    # the newest remaining entry, one lookup on entry_blog_feed_idx
+    latest = (Entry.objects.filter(blog_id=OuterRef('pk')).order_by('-pub_date')
+              .values('pub_date')[:1])
+    Blog.objects.filter(pk=instance.blog_id).update(entry_count=counter_plus('entry_count', -1),
+                                                    last_pub_date=Subquery(latest))
+
+
+@receiver(post_save, sender=File)
+def count_blog_file(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_blog_counters(entry_id=instance.entry_id, files=1)
+
+
+@receiver(post_delete, sender=File)
+def uncount_blog_file(sender, instance, **kwargs):
+    # the files of a deleted entry go first, the entry row is still there
+    adjust_blog_counters(entry_id=instance.entry_id, files=-1)
+
+
+# invalidation of the cached feed pages, only for changes the feed shows
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def invalidate_feed_on_entry(sender, **kwargs):
+    invalidate_feed()
+
+
+@receiver(m2m_changed, sender=Blog.tag_set.through)
+def invalidate_feed_on_tags(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_feed()
+
+
+def _author_names(user):
+    # read __dict__ so deferred fields are never fetched just for this
+    return tuple(user.__dict__.get(field) for field in AUTHOR_FIELDS)
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_author_names(sender, instance, **kwargs):
+    instance._feed_author_names = _author_names(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_feed_on_author(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not set(update_fields) & set(AUTHOR_FIELDS)):
+        return
+    if _author_names(instance) != instance._feed_author_names:
+        instance._feed_author_names = _author_names(instance)
+        invalidate_feed()
+
+
+# resized copies of uploaded images
+@receiver(post_save, sender=File)
+def make_file_variants(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.file:
+        schedule_variants(instance)
+
+
+@receiver(post_delete, sender=File)
+def release_file_blob(sender, instance, **kwargs):
+    release_blob(instance.file.name)
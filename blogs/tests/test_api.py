@@ -0,0 +1,113 @@
+import json
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from blogs.feed_cache import feed_cache
+from blogs.models import Blog, Entry, File
+
+
+class ApiTest(TestCase):
+    """ Tests for the JSON API of the feed, blogs and entries """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1, tag2')
+        for i in range(1, 6):
+            Entry.objects.create(blog=cls.blog, title=f'title{i}', body_text=f'text{i}')
+        cls.entry = Entry.objects.get(title='title1')
+        File.objects.create(entry=cls.entry, file='files/photo.png', description='photo')
+        cls.expected = list(Entry.objects.order_by('-pub_date', 'id').values_list('id', flat=True))
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def get_json(self, url, **params):
+        response = self.client.get(url, params)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, json.loads(content)
+
+    def test_feed_pages(self):
+        url = reverse('api-feed')
+        response, data = self.get_json(url, limit=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertTrue(response.streaming)
+        self.assertEqual(set(data['results'][0]),
+                         {'id', 'title', 'pub_date', 'mod_date', 'blog', 'author'})
+        self.assertEqual(data['results'][0]['author'], 'testUser_4')
+        ids = [row['id'] for row in data['results']]
+        while data['next']:
+            response, data = self.get_json(url, limit=2, cursor=data['next'])
+            ids += [row['id'] for row in data['results']]
+        self.assertEqual(ids, self.expected)
+        response, data = self.get_json(url, limit=2, cursor=data['previous'])
+        self.assertEqual([row['id'] for row in data['results']], self.expected[2:4])
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response, data = self.get_json(reverse('api-feed'), fields='title')
+        self.assertEqual(data['results'][0], {'title': 'title5'})
+        sql = queries[-1]['sql']
+        self.assertNotIn('body_text', sql)
+        self.assertNotIn('auth_user', sql)
+        response, data = self.get_json(reverse('api-feed'), fields='title,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', data['error'])
+        response, data = self.get_json(reverse('api-feed'), limit=0)
+        self.assertEqual(response.status_code, 400)
+
+    def test_limit_cap(self):
+        url = reverse('api-feed')
+        response, data = self.get_json(url, limit=101)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('100', data['error'])
+        self.client.force_login(self.user)
+        response, data = self.get_json(url, limit=101)
+        self.assertEqual(response.status_code, 200)
+        response, data = self.get_json(url, limit=1001)
+        self.assertEqual(response.status_code, 400)
+
+    def test_feed_etag(self):
+        url = reverse('api-feed')
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         304)
+        self.assertNotEqual(self.client.get(url, {'fields': 'id'})['ETag'], response['ETag'])
+        Entry.objects.create(blog=self.blog, title='title6', body_text='text6')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         200)
+
+    def test_login_required(self):
+        for url in (reverse('api-blog', args=[self.blog.id]),
+                    reverse('api-blog-entries', args=[self.blog.id]),
+                    reverse('api-entry', args=[self.entry.id])):
+            response, data = self.get_json(url)
+            self.assertEqual(response.status_code, 403)
+            self.assertIn('error', data)
+
+    def test_blog(self):
+        self.client.force_login(self.user)
+        response, data = self.get_json(reverse('api-blog', args=[self.blog.id]))
+        self.assertEqual(data['tags'], ['tag1', 'tag2'])
+        self.assertEqual((data['owner'], data['entry_count']), ('testUser_4', 5))
+        response, data = self.get_json(reverse('api-blog-entries', args=[self.blog.id]),
+                                       fields='id')
+        self.assertEqual([row['id'] for row in data['results']], self.expected)
+        response, data = self.get_json(reverse('api-blog', args=[self.blog.id + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_entry(self):
+        self.client.force_login(self.user)
+        url = reverse('api-entry', args=[self.entry.id])
+        response, data = self.get_json(url)
+        self.assertEqual(data['body_text'], 'text1')
+        self.assertEqual(data['files'][0]['description'], 'photo')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         304)
+        # session, user, entry state for the etag and the entry, no files
+        with self.assertNumQueries(4):
+            response, data = self.get_json(url, fields='title')
+        self.assertEqual(data, {'title': 'title1'})
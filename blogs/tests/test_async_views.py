@@ -0,0 +1,106 @@
+import importlib
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import clear_url_caches, resolve, reverse
+from blog_platform import urls as project_urls
+from blogs import async_views, urls, views
+from blogs.feed_cache import feed_cache, feed_cache_stats
+from blogs.models import Blog, Entry, File
+from users.models import Profile
+
+
+def reload_urls():
+    """ blogs.urls picks the views by ASYNC_READ_VIEWS when it is imported """
+    importlib.reload(urls)
+    importlib.reload(project_urls)
+    clear_url_caches()
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class AsyncViewsTest(TestCase):
+    """ Tests for the async feed, blog and entry pages """
+    @classmethod
+    def setUpClass(cls):
+        # class cleanups run last first: the urls are reloaded after the
+        # settings override, registered by super(), is undone
+        cls.addClassCleanup(reload_urls)
+        super().setUpClass()
+        reload_urls()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=cls.blog, title='entry_title', body_text='text')
+        File.objects.create(entry=cls.entry, file='files/photo.png', description='photo')
+
+    def setUp(self):
+        feed_cache().clear()
+        self.async_client.force_login(self.user)
+
+    def test_routed(self):
+        for url in (reverse('main'), reverse('entry-list', args=[self.blog.id]),
+                    reverse('detail-entry', args=[self.entry.id])):
+            self.assertEqual(resolve(url).func.view_class.__module__, async_views.__name__)
+
+    async def test_main_page(self):
+        response = await self.async_client.get(reverse('main'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'entry_title')
+        self.assertContains(response, 'testUser_4')
+        response = await self.async_client.get(reverse('main'))
+        self.assertContains(response, 'entry_title')
+        stats = feed_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    async def test_blog_page(self):
+        url = reverse('entry-list', args=[self.blog.id])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'first_blog')
+        self.assertContains(response, reverse('detail-entry', args=[self.entry.id]))
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_entry_page(self):
+        url = reverse('detail-entry', args=[self.entry.id])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'entry_title')
+        self.assertContains(response, 'photo')
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_model_backend_session(self):
+        # a session started before ProfileModelBackend, the profile is not preloaded
+        await Profile.objects.acreate(user=self.user)
+        await sync_to_async(self.async_client.force_login)(
+            self.user, backend='django.contrib.auth.backends.ModelBackend')
+        for url in (reverse('main'), reverse('entry-list', args=[self.blog.id]),
+                    reverse('detail-entry', args=[self.entry.id])):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    async def test_missing_entry(self):
+        response = await self.async_client.get(reverse('detail-entry', args=[self.entry.id + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_login_required(self):
+        self.async_client.cookies.clear()
+        url = reverse('detail-entry', args=[self.entry.id])
+        response = await self.async_client.get(url)
+        self.assertRedirects(response, reverse('login') + '?next=' + url,
+                             fetch_redirect_response=False)
+
+
+class SyncRoutingTest(SimpleTestCase):
+    """ The sync views are routed again once AsyncViewsTest is done """
+    def test_routed(self):
+        for name, view in (('main', views.MainPageView), ('entry-list', views.BlogDetailView),
+                           ('detail-entry', views.EntryDetailView)):
+            url = reverse(name, args=[] if name == 'main' else [1])
+            self.assertIs(resolve(url).func.view_class, view)
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from blog_platform.storage import blob_storage
+from blogs.attachments import attachment_batch
+from blogs.models import Blog, Entry, File
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload(name, color):
+    buffer = BytesIO()
+    Image.new('RGB', (300, 100), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_PROCESSES=0)
+class AttachmentBatchTest(TestCase):
+    """ Tests for saving the files of an entry in one batch """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_files_inserted_at_once(self):
+        self.client.force_login(self.user)
+        uploads = [image_upload(f'{color}.png', color) for color in ('red', 'green', 'blue')]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('create-entry', args=[self.blog.id]),
+                                        {'title': 'entry_title', 'body_text': 'text',
+                                         'description': 'photo', 'file': uploads})
+        self.assertEqual(response.status_code, 302)
+        inserts = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('INSERT INTO "blogs_file"')]
+        self.assertEqual(len(inserts), 1)
+        files = File.objects.filter(entry__title='entry_title')
+        self.assertEqual(files.count(), 3)
+        for file in files:
+            self.assertEqual((file.width, file.height, file.description), (300, 100, 'photo'))
+            self.assertTrue(blob_storage.exists(file.file.name))
+
+    def test_files_removed_on_rollback(self):
+        entry = Entry.objects.create(blog=self.blog, title='entry_title', body_text='text')
+        with self.assertRaises(RuntimeError):
+            with attachment_batch() as attachments:
+                files = attachments.save(entry, [image_upload('a.png', 'black'),
+                                                 image_upload('b.png', 'white')])
+                raise RuntimeError
+        self.assertFalse(File.objects.exists())
+        for file in files:
+            self.assertFalse(blob_storage.exists(file.file.name))
+        self.assertEqual(os.listdir(blob_storage.path('blobs/tmp')), [])
+
+    def test_shared_blob_kept_on_rollback(self):
+        entry = Entry.objects.create(blog=self.blog, title='entry_title', body_text='text')
+        kept = File.objects.create(entry=entry, file=image_upload('a.png', 'yellow'))
+        with self.assertRaises(RuntimeError):
+            with attachment_batch() as attachments:
+                attachments.save(entry, [image_upload('b.png', 'yellow')])
+                raise RuntimeError
+        self.assertTrue(blob_storage.exists(kept.file.name))
+
+    def test_blob_reused_meanwhile_kept_on_rollback(self):
+        entry = Entry.objects.create(blog=self.blog, title='entry_title', body_text='text')
+        with self.assertRaises(RuntimeError):
+            with attachment_batch() as attachments:
+                [file] = attachments.save(entry, [image_upload('a.png', 'orange')])
+                # another upload of the same content, its row not yet committed
+                path = blob_storage.path(file.file.name)
+                mtime = os.stat(path).st_mtime
+                os.utime(path, (mtime + 1, mtime + 1))
+                raise RuntimeError
+        self.assertTrue(blob_storage.exists(file.file.name))
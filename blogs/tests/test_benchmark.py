@@ -0,0 +1,72 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from blogs.feed_cache import feed_cache
+from blogs.models import Blog, Entry, File, Tag
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeedAndBenchmarkTest(TestCase):
+    """ Tests for the seed_data and benchmark_views commands """
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_data', users=3, blogs_per_user=2, entries_per_blog=5,
+                     files_per_entry=1, images=2, body_size=200, seed=1, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def test_seeded_rows(self):
+        self.assertEqual(get_user_model().objects.filter(profiles__isnull=False).count(), 3)
+        self.assertEqual(Blog.objects.count(), 6)
+        self.assertEqual(Entry.objects.count(), 30)
+        self.assertEqual(Entry.objects.values('pub_date').distinct().count(), 30)
+        self.assertEqual(File.objects.values('file').distinct().count(),
+                         min(2, File.objects.count()))
+        self.assertEqual(sum(Tag.objects.values_list('entry_count', flat=True)),
+                         sum(blog.tag_set.count() * 5 for blog in Blog.objects.all()))
+
+    def test_benchmark_report(self):
+        output = StringIO()
+        call_command('benchmark_views', requests=2, warmup=0, host='testserver',
+                     routes=['main', 'entry-list', 'detail-entry', 'search', 'profile'],
+                     stdout=output, stderr=StringIO())
+        report = json.loads(output.getvalue())
+        self.assertEqual(set(report['views']), {'main', 'entry-list', 'detail-entry',
+                                                'search', 'profile'})
+        for result in report['views'].values():
+            self.assertEqual(result['status'], 200)
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+
+class ServerBenchmarkTest(TransactionTestCase):
+    """ Tests for the benchmark_servers command, its clients run in other threads """
+    def setUp(self):
+        feed_cache().clear()
+        user = get_user_model().objects.create_user(username='testUser_4',
+                                                    password='1X<ISRUkw+tuK')
+        blog = Blog.objects.create(user=user, name='first_blog', tags='tag1')
+        Entry.objects.create(blog=blog, title='entry_title', body_text='text')
+
+    def test_report(self):
+        for server in ('wsgi', 'asgi'):
+            output = StringIO()
+            call_command('benchmark_servers', server=server, clients=3, requests=2, warmup=0,
+                         host='testserver', stdout=output)
+            report = json.loads(output.getvalue())
+            self.assertEqual(report['server'], server)
+            self.assertEqual(len(report['urls']), 3)
+            self.assertEqual(report['requests'], 6)
+            self.assertEqual(report['errors'], 0)
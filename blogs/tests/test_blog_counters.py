@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+from blogs.attachments import attachment_batch
+from blogs.importers import import_entries
+from blogs.models import Blog, Entry, File
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload(name, color):
+    buffer = BytesIO()
+    Image.new('RGB', (30, 10), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_PROCESSES=0)
+class BlogCountersTest(TestCase):
+    """ Tests for the entry and file counters of a blog """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def counters(self):
+        self.blog.refresh_from_db()
+        return self.blog.entry_count, self.blog.file_count, self.blog.last_pub_date
+
+    def test_entries_and_files(self):
+        first = Entry.objects.create(blog=self.blog, title='first', body_text='text')
+        second = Entry.objects.create(blog=self.blog, title='second', body_text='text')
+        File.objects.create(entry=first, file=image_upload('a.png', 'red'))
+        with attachment_batch() as attachments:
+            attachments.save(second, [image_upload('b.png', 'green'),
+                                      image_upload('c.png', 'blue')])
+        self.assertEqual(self.counters(), (2, 3, second.pub_date))
+        second.delete()
+        self.assertEqual(self.counters(), (1, 1, first.pub_date))
+        first.files.get().delete()
+        first.delete()
+        self.assertEqual(self.counters(), (0, 0, None))
+
+    def test_import(self):
+        content = b'title1,text1\ntitle2,text2\n'
+        import_entries(SimpleUploadedFile('entries.csv', content), self.blog.id)
+        latest = Entry.objects.filter(blog=self.blog).latest('pub_date').pub_date
+        self.assertEqual(self.counters(), (2, 0, latest))
+
+    def test_edit_keeps_counters(self):
+        Entry.objects.create(blog=self.blog, title='first', body_text='text')
+        blog = Blog.objects.get(pk=self.blog.pk)
+        Entry.objects.create(blog=self.blog, title='second', body_text='text')
+        # saved with the counters it was loaded with
+        blog.name = 'renamed'
+        blog.save()
+        self.assertEqual(self.counters()[0], 2)
+        self.assertEqual(self.blog.name, 'renamed')
+
+    def test_drifted_counters_stop_at_zero(self):
+        entry = Entry.objects.create(blog=self.blog, title='first', body_text='text')
+        File.objects.create(entry=entry, file=image_upload('a.png', 'red'))
+        Blog.objects.filter(pk=self.blog.pk).update(entry_count=0, file_count=0)
+        entry.delete()
+        self.assertEqual(self.counters(), (0, 0, None))
+
+    def test_reconcile(self):
+        entry = Entry.objects.create(blog=self.blog, title='first', body_text='text')
+        Blog.objects.filter(pk=self.blog.pk).update(entry_count=7, file_count=3,
+                                                    last_pub_date=entry.pub_date - timedelta(1))
+        other = Blog.objects.create(user=self.user, name='second_blog', tags='tag1')
+        output = StringIO()
+        call_command('reconcile_blog_counters', stdout=output)
+        self.assertIn('1 blogs repaired', output.getvalue())
+        self.assertEqual(self.counters(), (1, 0, entry.pub_date))
+        other.refresh_from_db()
+        self.assertEqual((other.entry_count, other.last_pub_date), (0, None))
+
+    def test_blog_list(self):
+        Entry.objects.create(blog=self.blog, title='first', body_text='text')
+        self.client.force_login(self.user)
+        # session, user and the blogs with their counters
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('blog-list'))
+        self.assertContains(response, 'Статей: 1')
+        self.assertContains(response, 'Файлов: 0')
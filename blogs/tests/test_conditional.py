@@ -0,0 +1,75 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from blogs.conditional import _blog_state_query
+from blogs.models import Blog, Entry, File
+
+
+class ConditionalGetTest(TestCase):
+    """ Tests for the ETag of the entry and blog pages """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=cls.blog, title='entry_title', body_text='text')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_entry_not_modified(self):
+        url = reverse('detail-entry', args=[self.entry.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+    def test_entry_changes_are_detected(self):
+        url = reverse('detail-entry', args=[self.entry.id])
+        response = self.client.get(url)
+        File.objects.create(entry=self.entry, file='files/test.png')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        response = self.client.get(url)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_blog_changes_are_detected(self):
+        url = reverse('entry-list', args=[self.blog.id])
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.entry.delete()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_validators_are_per_viewer(self):
+        url = reverse('detail-entry', args=[self.entry.id])
+        response = self.client.get(url)
+        other = get_user_model().objects.create_user(username='other', password='x')
+        self.client.force_login(other)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_no_last_modified(self):
+        # a date alone would answer 304 to another viewer or a new attachment
+        for url in (reverse('detail-entry', args=[self.entry.id]),
+                    reverse('entry-list', args=[self.blog.id])):
+            response = self.client.get(url)
+            self.assertFalse(response.has_header('Last-Modified'))
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+            self.assertEqual(response.status_code, 200)
+
+    def test_login_still_required(self):
+        url = reverse('detail-entry', args=[self.entry.id])
+        response = self.client.get(url)
+        self.client.logout()
+        self.assertEqual(self.revalidate(url, response).status_code, 302)
+
+    def test_blog_state_is_one_seek(self):
+        sql, params = _blog_state_query(self.blog.id).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('entry_blog_mod_idx', plan)
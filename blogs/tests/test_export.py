@@ -0,0 +1,72 @@
+import gzip
+import json
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from blogs.importers import import_entries
+from blogs.models import Blog, Entry
+
+
+@override_settings(ENTRY_EXPORT_CHUNK_SIZE=2)
+class ExportEntriesTest(TestCase):
+    """ Tests for the streaming csv and jsonl export """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.bodies = {'title1': 'plain', 'title, "quoted"': 'multi\nline, body',
+                      'título3': 'текст', 'title4': ''}
+        for title, body in cls.bodies.items():
+            Entry.objects.create(blog=cls.blog, title=title, body_text=body)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('export-entries', args=[self.blog.id]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_round_trip(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'blog_{self.blog.id}.csv', response['Content-Disposition'])
+        other = Blog.objects.create(user=self.user, name='second_blog', tags='tag2')
+        result = import_entries(SimpleUploadedFile('entry.csv', content), other.id)
+        self.assertEqual((result.created, result.malformed), (4, 0))
+        self.assertEqual(dict(other.entries.values_list('title', 'body_text')), self.bodies)
+
+    def test_jsonl(self):
+        response, content = self.export(format='jsonl')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual({row['title']: row['body'] for row in rows}, self.bodies)
+        self.assertEqual(set(rows[0]), {'title', 'body', 'pub_date', 'mod_date'})
+
+    def test_gzip(self):
+        response, plain = self.export(format='jsonl')
+        response, content = self.export(format='jsonl', gzip=1)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.jsonl.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(content), plain)
+
+    def test_one_select_of_entries(self):
+        # session, user, blog, then the entries fetched two by two from one cursor
+        with self.assertNumQueries(4):
+            self.export()
+
+    def test_only_own_blog(self):
+        other = get_user_model().objects.create_user(username='testUser_5',
+                                                     password='1X<ISRUkw+tuK')
+        self.client.force_login(other)
+        response = self.client.get(reverse('export-entries', args=[self.blog.id]))
+        self.assertEqual(response.status_code, 404)
+        self.client.logout()
+        response = self.client.get(reverse('export-entries', args=[self.blog.id]))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('export-entries', args=[self.blog.id]),
+                                   {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
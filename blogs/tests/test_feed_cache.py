@@ -0,0 +1,68 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from blogs.feed_cache import feed_cache, feed_cache_stats
+from blogs.importers import import_entries
+from blogs.models import Blog, Entry
+
+
+class FeedCacheTest(TestCase):
+    """ Tests for the cached feed pages """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK',
+                                                        first_name='Name', last_name='Surname')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=cls.blog, title='entry_title', body_text='text')
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def get_main(self, queries, language='ru'):
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse('main'), HTTP_ACCEPT_LANGUAGE=language)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_runs_no_query(self):
+        self.get_main(1)
+        response = self.get_main(0)
+        self.assertContains(response, 'entry_title')
+        self.assertEqual(feed_cache_stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_languages_are_cached_separately(self):
+        self.get_main(1, 'ru')
+        self.get_main(1, 'en')
+        self.get_main(0, 'ru')
+        self.get_main(0, 'en')
+
+    def test_entry_changes_invalidate(self):
+        self.get_main(1)
+        self.entry.title = 'new_title'
+        self.entry.save()
+        self.assertContains(self.get_main(1), 'new_title')
+        self.entry.delete()
+        self.assertNotContains(self.get_main(1), 'new_title')
+
+    def test_import_invalidates(self):
+        self.get_main(1)
+        import_entries(SimpleUploadedFile('entry.csv', b'imported,text\n'), self.blog.id)
+        self.assertContains(self.get_main(1), 'imported')
+
+    def test_author_name_change_invalidates(self):
+        self.get_main(1)
+        self.user.last_login = None
+        self.user.save(update_fields=['last_login'])
+        self.user.save()
+        self.get_main(0)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertContains(self.get_main(1), 'Renamed Surname')
+
+    def test_tag_feed_is_cached(self):
+        url = reverse('tag-feed', args=['tag1'])
+        self.assertContains(self.client.get(url), 'entry_title')
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), 'entry_title')
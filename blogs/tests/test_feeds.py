@@ -0,0 +1,68 @@
+from unittest import mock
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from blogs.feed_cache import feed_cache
+from blogs.models import Blog, Entry
+
+
+class SyndicationFeedTest(TestCase):
+    """ Tests for the cached RSS and Atom feeds """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.other = Blog.objects.create(user=cls.user, name='second_blog', tags='tag2')
+        cls.entry = Entry.objects.create(blog=cls.blog, title='entry_title', body_text='text')
+        Entry.objects.create(blog=cls.other, title='other_title', body_text='text')
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def test_sitewide_rss(self):
+        response = self.client.get(reverse('rss'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/rss+xml'))
+        self.assertContains(response, 'entry_title')
+        self.assertContains(response, 'other_title')
+        self.assertContains(response, reverse('detail-entry', args=[self.entry.id]))
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse('rss'))
+        self.assertEqual(cached.content, response.content)
+
+    def test_not_modified(self):
+        response = self.client.get(reverse('atom'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(reverse('atom'),
+                                           HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.client.get(reverse('atom'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_invalidated_on_entry_save(self):
+        response = self.client.get(reverse('rss'))
+        self.entry.title = 'new_title'
+        self.entry.save()
+        changed = self.client.get(reverse('rss'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, 'new_title')
+
+    def test_blog_feeds(self):
+        response = self.client.get(reverse('blog-atom', args=[self.blog.id]))
+        self.assertTrue(response['Content-Type'].startswith('application/atom+xml'))
+        self.assertContains(response, 'first_blog')
+        self.assertContains(response, 'entry_title')
+        self.assertNotContains(response, 'other_title')
+        self.blog.name = 'renamed_blog'
+        self.blog.save()
+        response = self.client.get(reverse('blog-rss', args=[self.blog.id]))
+        self.assertContains(response, 'renamed_blog')
+        response = self.client.get(reverse('blog-rss', args=[self.other.id + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_blog_save_invalidates_once(self):
+        with mock.patch('blogs.signals.invalidate_feed') as invalidate:
+            self.blog.save()
+        invalidate.assert_called_once_with()
@@ -0,0 +1,93 @@
+import os.path
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+from blogs.images import variant_name
+from blogs.models import Blog, Entry, File
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload(name='photo.png', size=(1000, 500)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_PROCESSES=0)
+class ImageVariantTest(TestCase):
+    """ Tests for the resized variants of entry images """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=blog, title='entry_title', body_text='text')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_variants_made_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            file = File.objects.create(entry=self.entry, file=image_upload())
+        self.assertEqual((file.width, file.height), (1000, 500))
+        file.refresh_from_db()
+        self.assertEqual(file.variants, [200, 400, 800])
+        with Image.open(os.path.join(MEDIA_ROOT, variant_name(file.file.name, 400))) as image:
+            self.assertEqual(image.size, (400, 200))
+        self.assertIn('_200w.png 200w', file.srcset)
+        self.assertIn(f'{file.file.url} 1000w', file.srcset)
+        self.assertTrue(file.display_url.endswith('_200w.png'))
+
+    def test_small_image_is_not_upscaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            file = File.objects.create(entry=self.entry, file=image_upload(size=(300, 100)))
+        file.refresh_from_db()
+        self.assertEqual(file.variants, [200])
+
+    def test_template_uses_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            File.objects.create(entry=self.entry, file=image_upload())
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('detail-entry', args=[self.entry.id]))
+        self.assertContains(response, 'srcset=')
+        self.assertContains(response, 'height="100"')
+
+    def test_backfill_command(self):
+        file = File.objects.create(entry=self.entry, file=image_upload())
+        File.objects.filter(pk=file.pk).update(width=None, height=None, variants=[])
+        out = StringIO()
+        call_command('make_image_variants', processes=1, stdout=out)
+        self.assertIn('1 images done', out.getvalue())
+        file.refresh_from_db()
+        self.assertEqual((file.width, file.variants), (1000, [200, 400, 800]))
+
+    def test_backfill_skips_small_images_and_survives_bad_ones(self):
+        small = File.objects.create(entry=self.entry, file=image_upload(size=(150, 100)))
+        File.objects.filter(pk=small.pk).update(width=None, height=None, variants=[])
+        out = StringIO()
+        call_command('make_image_variants', processes=1, stdout=out)
+        self.assertIn('1 images done', out.getvalue())
+        out = StringIO()
+        call_command('make_image_variants', processes=1, stdout=out)
+        self.assertIn('0 images done', out.getvalue())
+
+        File.objects.create(entry=self.entry, file=image_upload('big.png'))
+        File.objects.create(entry=self.entry, file=image_upload('other.png'))
+        File.objects.exclude(pk=small.pk).update(width=None, variants=[])
+        out, err = StringIO(), StringIO()
+        # decoding more than twice this many pixels raises DecompressionBombError
+        with mock.patch('PIL.Image.MAX_IMAGE_PIXELS', 1000):
+            call_command('make_image_variants', processes=1, batch_size=1, stdout=out,
+                         stderr=err)
+        self.assertIn('0 images done, 2 failed', out.getvalue())
+        self.assertIn('decompression bomb', err.getvalue())
@@ -0,0 +1,90 @@
+import shutil
+from datetime import timedelta
+from io import StringIO
+import tempfile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from blogs.models import Blog, Entry, ImportJob
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, ENTRY_IMPORT_INLINE_MAX_SIZE=0)
+class ImportJobTest(TestCase):
+    """ Tests for queued entry imports """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def status(self, job):
+        response = self.client.get(reverse('import-status', args=[self.blog.id, job.id]))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_upload_is_queued_and_run_by_worker(self):
+        upload = SimpleUploadedFile('entry.csv', b'title1,text1\ntitle2,text2\nbroken\n')
+        response = self.client.post(reverse('upload-entry', args=[self.blog.id]),
+                                    {'file': upload})
+        self.assertRedirects(response, reverse('entry-list', args=[self.blog.id]))
+        self.assertFalse(Entry.objects.exists())
+        job = ImportJob.objects.get()
+        self.assertEqual(self.status(job)['status'], ImportJob.PENDING)
+
+        call_command('run_import_worker', processes=0, once=True, stdout=StringIO())
+        self.assertEqual(Entry.objects.filter(blog=self.blog).count(), 2)
+        status = self.status(job)
+        self.assertEqual(status['status'], ImportJob.DONE)
+        self.assertEqual((status['processed'], status['created'], status['malformed']), (3, 2, 1))
+
+    def test_job_is_claimed_once(self):
+        job = ImportJob.objects.create(blog=self.blog,
+                                       file=SimpleUploadedFile('entry.csv', b'a,b\n'))
+        call_command('run_import_worker', processes=0, once=True, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.DONE)
+        call_command('run_import_worker', processes=0, once=True, stdout=StringIO())
+        self.assertEqual(Entry.objects.count(), 1)
+
+    def test_status_of_other_blog_not_found(self):
+        job = ImportJob.objects.create(blog=self.blog, file='imports/missing.csv')
+        response = self.client.get(reverse('import-status', args=[self.blog.id + 1, job.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_status_of_other_users_blog_not_found(self):
+        job = ImportJob.objects.create(blog=self.blog, file='imports/missing.csv')
+        other = get_user_model().objects.create_user(username='testUser_5',
+                                                     password='1X<ISRUkw+tuK')
+        self.client.force_login(other)
+        response = self.client.get(reverse('import-status', args=[self.blog.id, job.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_stale_running_job_is_reclaimed(self):
+        upload = SimpleUploadedFile('entry.csv', b'title1,text1\n')
+        # started long ago, but its worker still reports progress
+        fresh = ImportJob.objects.create(blog=self.blog, file=upload, status=ImportJob.RUNNING,
+                                         started_at=timezone.now() - timedelta(hours=2),
+                                         heartbeat_at=timezone.now())
+        call_command('run_import_worker', processes=0, once=True, stdout=StringIO())
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, ImportJob.RUNNING)
+
+        ImportJob.objects.filter(pk=fresh.pk).update(
+            heartbeat_at=timezone.now() - timedelta(hours=2))
+        call_command('run_import_worker', processes=0, once=True, stdout=StringIO())
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, ImportJob.DONE)
+        self.assertEqual(Entry.objects.filter(blog=self.blog).count(), 1)
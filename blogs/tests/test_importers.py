@@ -0,0 +1,87 @@
+import os.path
+from unittest import mock
+from django.db import IntegrityError
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from blogs.models import Blog, Entry, title_hash
+from blogs.importers import import_entries
+
+
+class ImportEntriesTest(TestCase):
+    """ Tests for the streaming csv importer """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+
+    def upload(self, content):
+        return SimpleUploadedFile('entry.csv', content)
+
+    def test_created_skipped_malformed(self):
+        Entry.objects.create(blog=self.blog, title='existing', body_text='text')
+        content = ('title1,"multi\nline body"\n'
+                   '\n'
+                   'existing,text\n'
+                   'title1,repeated in file\n'
+                   'no body\n'
+                   ',empty title\n'
+                   'título2,text2\n').encode()
+        result = import_entries(self.upload(content), self.blog.id)
+        self.assertEqual((result.created, result.skipped, result.malformed), (2, 2, 2))
+        self.assertEqual(Entry.objects.get(title='title1').body_text, 'multi\nline body')
+        self.assertTrue(Entry.objects.filter(title='título2', blog=self.blog).exists())
+
+    def test_dedup_is_per_blog_and_normalized(self):
+        other = Blog.objects.create(user=self.user, name='second_blog', tags='tag2')
+        Entry.objects.create(blog=other, title='Title1', body_text='text')
+        content = b'Title1,text1\n  title1 ,text2\n'
+        result = import_entries(self.upload(content), self.blog.id)
+        self.assertEqual((result.created, result.skipped), (1, 1))
+        self.assertEqual(Entry.objects.filter(title_hash=title_hash('TITLE1')).count(), 2)
+
+    def test_invalid_encoding_is_malformed(self):
+        content = b'title1,text1\n\xff\xfe,broken\ntitle2,text2\n'
+        result = import_entries(self.upload(content), self.blog.id)
+        self.assertEqual((result.created, result.malformed), (2, 1))
+
+    def test_queries_per_batch(self):
+        content = ''.join(f'title{i},text{i}\n' for i in range(10)).encode()
+        # the blog lookup, then select, savepoint, insert, tag counts, blog
+        # counters and release for each of the 2 batches
+        with self.assertNumQueries(13):
+            result = import_entries(self.upload(content), self.blog.id, batch_size=5)
+        self.assertEqual(result.created, 10)
+
+    def test_upload_view_reports_summary(self):
+        self.client.force_login(self.user)
+        with open(os.path.join(os.path.dirname(__file__), 'entry.csv'), 'rb') as file:
+            response = self.client.post(reverse('upload-entry', args=[self.blog.id]),
+                                        {'file': file}, follow=True)
+        self.assertEqual(Entry.objects.count(), 2)
+        self.assertEqual(len(list(response.context['messages'])), 1)
+
+    def test_unknown_blog(self):
+        with self.assertRaises(Blog.DoesNotExist):
+            import_entries(self.upload(b'a,b\n'), 9999)
+        self.assertFalse(Entry.objects.exists())
+
+    def test_other_integrity_error_is_raised(self):
+        error = IntegrityError('CHECK constraint failed: entry_count')
+        with mock.patch('blogs.importers.adjust_tag_entry_counts', side_effect=error) as adjust:
+            with self.assertRaises(IntegrityError):
+                import_entries(self.upload(b'title1,text1\n'), self.blog.id)
+        self.assertEqual(adjust.call_count, 1)
+        self.assertFalse(Entry.objects.exists())
+
+    def test_upload_view_needs_own_blog(self):
+        other = get_user_model().objects.create_user(username='testUser_5',
+                                                     password='1X<ISRUkw+tuK')
+        self.client.force_login(other)
+        for blog_id in (self.blog.id, 9999):
+            response = self.client.post(reverse('upload-entry', args=[blog_id]),
+                                        {'file': self.upload(b'title1,text1\n')})
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(Entry.objects.exists())
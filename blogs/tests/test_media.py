@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from blog_platform.storage import blob_storage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+CONTENT = bytes(range(256)) * 40
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaViewTest(TestCase):
+    """ Tests for sending uploaded files """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.name = blob_storage.save('photo.png', ContentFile(CONTENT))
+        self.url = f'/media/{self.name}'
+        self.client.force_login(self.user)
+
+    def test_whole_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_signed_in_users_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_only_served_folders(self):
+        default_storage.save('imports/entries.csv', ContentFile(b'title,text'))
+        self.assertEqual(self.client.get('/media/imports/entries.csv').status_code, 404)
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/files/missing.png').status_code, 404)
+
+    def test_partial_and_deleted_blobs_not_served(self):
+        for name in ('blobs/tmp/tmpab12cd', f'{self.name}.0123abcd.deleting'):
+            path = blob_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+            self.assertEqual(self.client.get(f'/media/{name}').status_code, 404)
+        self.assertEqual(self.client.get('/media/blobs/ab/../tmp/tmpab12cd').status_code, 404)
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '100')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-10:])
+
+    def test_range_not_satisfiable(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_x_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_SERVE_MODE='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], blob_storage.path(self.name))
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_x_accel_redirect_is_quoted(self):
+        name = default_storage.save('files/фото 1.png', ContentFile(CONTENT))
+        response = self.client.get(f'/media/{name}')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/files/%D1%84%D0%BE%D1%82%D0%BE%201.png')
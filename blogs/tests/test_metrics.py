@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from blog_platform import metrics
+from blog_platform.metrics import ARCHIVE, ValueFile, _key, collect, value_file
+from blogs.feed_cache import feed_cache
+from blogs.models import Blog, Entry
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=METRICS_DIR)
+class MetricsTest(TestCase):
+    """ Tests for the request metrics and the /metrics endpoint """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=blog, title='entry_title', body_text='text')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        for name in os.listdir(METRICS_DIR):
+            os.remove(os.path.join(METRICS_DIR, name))
+        metrics._files.clear()
+        feed_cache().clear()
+
+    def test_requests_labeled_by_url_name(self):
+        self.client.get(reverse('main'))
+        self.client.get(reverse('main'))
+        self.client.get('/missing/')
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{method="GET",status="200",view="main"} 2', text)
+        self.assertIn('http_requests_total{method="GET",status="404",view="unresolved"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="main",le="+Inf"} 2', text)
+        self.assertIn('http_request_duration_seconds_count{view="main"} 2', text)
+        self.assertIn('db_queries_per_request_count{view="main"} 2', text)
+        self.assertIn('# TYPE http_response_size_bytes histogram', text)
+
+    def test_buckets_are_cumulative(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('detail-entry', args=[self.entry.id]))
+        text = self.client.get(reverse('metrics')).content.decode()
+        # the entry page runs 5 queries
+        self.assertIn('db_queries_per_request_bucket{view="detail-entry",le="3"} 0', text)
+        self.assertIn('db_queries_per_request_bucket{view="detail-entry",le="5"} 1', text)
+        self.assertIn('db_queries_per_request_bucket{view="detail-entry",le="100"} 1', text)
+
+    def test_processes_added_up(self):
+        self.client.get(reverse('main'))
+        other = ValueFile(os.path.join(METRICS_DIR, 'other.db'))
+        key = _key('http_requests_total', {'view': 'main', 'method': 'GET', 'status': '200'})
+        other.add(key, 4)
+        self.assertEqual(collect()[key], 5)
+
+    def test_dead_processes_merged(self):
+        key = _key('http_requests_total', {'view': 'main', 'method': 'GET', 'status': '200'})
+        # no process has a pid this large
+        ValueFile(os.path.join(METRICS_DIR, '999999999.db')).add(key, 4)
+        ValueFile(os.path.join(METRICS_DIR, f'{os.getpid()}.db')).add(key, 1)
+        value_file()
+        self.assertEqual(sorted(name for name in os.listdir(METRICS_DIR) if name.endswith('.db')),
+                         sorted([ARCHIVE, f'{os.getpid()}.db']))
+        self.assertEqual(collect()[key], 5)
+
+    def test_file_grows(self):
+        values = ValueFile(os.path.join(METRICS_DIR, 'big.db'))
+        for number in range(3000):
+            values.add(f'key{number}', number)
+        values = ValueFile(os.path.join(METRICS_DIR, 'big.db'))
+        values.add('key2999', 1)
+        totals = collect()
+        self.assertEqual(totals['key10'], 10)
+        self.assertEqual(totals['key2999'], 3000)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_allowed_addresses_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from blogs.feed_cache import feed_cache
+from blogs.models import Blog, Entry
+from blogs.pagination import KeysetPaginator
+
+
+class KeysetPaginatorTest(TestCase):
+    """ Tests for KeysetPaginator """
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='testUser_4',
+                                                    password='1X<ISRUkw+tuK')
+        blog = Blog.objects.create(user=user, name='first_blog', tags='tag1')
+        for i in range(1, 8):
+            Entry.objects.create(blog=blog, title=f'title{i}', body_text=f'text{i}')
+        # entries with equal pub_date are ordered by id
+        Entry.objects.filter(title__in=['title3', 'title4', 'title5']).update(
+            pub_date=timezone.now())
+        cls.expected = list(Entry.objects.values_list('id', flat=True))
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def test_walk_forward_and_back(self):
+        paginator = KeysetPaginator(Entry.objects.all(), per_page=3)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        ids = [entry.id for page in pages for entry in page]
+        self.assertEqual(ids, self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous())
+
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual([e.id for e in previous], [e.id for e in pages[1]])
+        first = paginator.page(previous.previous_cursor)
+        self.assertEqual([e.id for e in first], [e.id for e in pages[0]])
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+    def test_stream_matches_pages(self):
+        paginator = KeysetPaginator(Entry.objects.all(), per_page=3)
+        cursor, pages = None, []
+        while True:
+            stream = paginator.stream(cursor, chunk_size=2)
+            pages.append(([entry.id for entry in stream], stream))
+            if not stream.has_next:
+                break
+            cursor = stream.next_cursor
+        self.assertEqual([ids for ids, stream in pages], [self.expected[:3], self.expected[3:6],
+                                                          self.expected[6:]])
+        self.assertIsNone(pages[0][1].previous_cursor)
+        for (ids, stream), (next_ids, next_stream) in zip(pages, pages[1:]):
+            back = paginator.stream(next_stream.previous_cursor)
+            self.assertEqual([entry.id for entry in back], ids)
+            self.assertEqual(back.has_previous, stream.has_previous)
+            self.assertEqual(back.next_cursor, stream.next_cursor)
+
+    def test_page_is_single_query(self):
+        paginator = KeysetPaginator(Entry.objects.all(), per_page=3)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('main'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_main_page_links(self):
+        response = self.client.get(reverse('main'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_other_pages())
+        self.assertEqual(len(response.context['entry_list']), len(self.expected))
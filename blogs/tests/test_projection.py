@@ -0,0 +1,47 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from blogs.feed_cache import feed_cache
+from blogs.models import Blog, Entry, EntryQuerySet
+
+
+class FeedProjectionTest(TestCase):
+    """ Tests for the narrow querysets of the feed and list views """
+    @classmethod
+    def setUpTestData(cls):
+        for u in range(1, 4):
+            user = get_user_model().objects.create_user(username=f'testUser{u}',
+                                                        password='1X<ISRUkw+tuK',
+                                                        first_name=f'Name{u}',
+                                                        last_name=f'Surname{u}' if u > 1 else '')
+            blog = Blog.objects.create(user=user, name=f'blog of {user.username}',
+                                       tags='tag')
+            for e in range(1, 4):
+                Entry.objects.create(blog=blog, title=f'entry{e}_title',
+                                     body_text='x' * 150)
+        cls.blog = blog
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def test_feed_excerpt_and_author(self):
+        entry = Entry.objects.feed().filter(blog=self.blog).first()
+        self.assertEqual(entry.excerpt, 'x' * EntryQuerySet.excerpt_length)
+        self.assertIn('body_text', entry.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual(entry.blog.user.first_name, 'Name3')
+
+    def test_main_page_queries_do_not_grow(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('main'))
+        self.assertContains(response, 'Name2 Surname2')
+        self.assertContains(response, 'testUser1')
+        self.assertNotContains(response, 'x' * 101)
+
+    def test_entry_list_queries(self):
+        self.client.force_login(self.blog.user)
+        # session, user, blog state, blog, entries
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('entry-list', args=[self.blog.id]))
+        self.assertEqual(len(response.context['entry_list']), 3)
+        self.assertIn('body_text', response.context['entry_list'][0].get_deferred_fields())
@@ -0,0 +1,110 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from blog_platform.testing import QueryBudgetMixin, query_budget
+from blogs.feed_cache import feed_cache, invalidate_feed
+from blogs.models import Blog, Entry, File, ImportJob, Tag, title_hash
+from users.models import Profile
+
+
+class BlogViewsQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """ Query budgets of the blogs views, at 10 and at 1000 rows """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK',
+                                                        first_name='Name', last_name='Surname')
+        Profile.objects.create(user=cls.user)
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='budget')
+        cls.tag = Tag.objects.get(name='budget')
+        cls.entry = Entry.objects.create(blog=cls.blog, title='entry_title',
+                                         body_text='budget text')
+        cls.job = ImportJob.objects.create(blog=cls.blog, file='imports/entries.csv')
+
+    def setUp(self):
+        feed_cache().clear()
+        self.made = 0
+        self.client.force_login(self.user)
+
+    def make_rows(self, count):
+        numbers = range(self.made, self.made + count)
+        self.made += count
+        users = get_user_model().objects.bulk_create(
+            [get_user_model()(username=f'author{n}', first_name=f'Name{n}',
+                              last_name=f'Surname{n}') for n in numbers])
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+        blogs = Blog.objects.bulk_create([Blog(user=user, name=f'blog{user.username}',
+                                               tags='budget') for user in users])
+        blogs += Blog.objects.bulk_create([Blog(user=self.user, name=f'own blog{n}',
+                                                tags='budget') for n in numbers])
+        Blog.tag_set.through.objects.bulk_create(
+            [Blog.tag_set.through(blog=blog, tag=self.tag) for blog in blogs])
+        Tag.objects.bulk_create([Tag(name=f'tag{n}', entry_count=1) for n in numbers])
+        entries = [Entry(blog=blog, title=f'budget entry {blog.name}',
+                         title_hash=title_hash(f'budget entry {blog.name}'),
+                         body_text='budget text') for blog in blogs]
+        entries += [Entry(blog=self.blog, title=f'budget entry {n}',
+                          title_hash=title_hash(f'budget entry {n}'),
+                          body_text='budget text') for n in numbers]
+        Entry.objects.bulk_create(entries)
+        File.objects.bulk_create([File(entry=self.entry, file=f'blobs/00/00/{n}.png',
+                                       width=800, height=600, variants=[200, 400])
+                                  for n in numbers])
+        invalidate_feed()
+
+    def get(self, url_name, *args, query=''):
+        response = self.client.get(reverse(url_name, args=args) + query)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    @query_budget(3)
+    def test_blog_list(self):
+        self.get('blog-list')
+
+    @query_budget(2)
+    def test_blog_create(self):
+        self.get('create-blog')
+
+    @query_budget(3)
+    def test_blog_edit(self):
+        self.get('blog-edit', self.blog.pk)
+
+    @query_budget(5)
+    def test_blog_detail(self):
+        self.get('entry-list', self.blog.pk)
+
+    @query_budget(2)
+    def test_entry_create(self):
+        self.get('create-entry', self.blog.pk)
+
+    @query_budget(5)
+    def test_entry_detail(self):
+        self.get('detail-entry', self.entry.pk)
+
+    @query_budget(3)
+    def test_entry_edit(self):
+        self.get('edit-entry', self.entry.pk)
+
+    @query_budget(3)
+    def test_main_page(self):
+        self.get('main')
+
+    @query_budget(4)
+    def test_tag_feed(self):
+        self.get('tag-feed', self.tag.name)
+
+    @query_budget(3)
+    def test_tag_list(self):
+        self.get('tag-list')
+
+    @query_budget(4)
+    def test_search(self):
+        self.get('search', query='?q=budget')
+
+    @query_budget(3)
+    def test_upload_entry(self):
+        self.get('upload-entry', self.blog.pk)
+
+    @query_budget(3)
+    def test_import_status(self):
+        self.get('import-status', self.blog.pk, self.job.pk)
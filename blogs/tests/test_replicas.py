@@ -0,0 +1,63 @@
+from unittest import mock
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from blog_platform.replicas import read_from_replica
+from blogs.feed_cache import feed_cache
+from blogs.models import Blog, Entry
+
+
+@override_settings(REPLICA_DATABASES=['replica1', 'replica2'])
+class ReplicaRoutingTest(TestCase):
+    """ Tests for reading the feed, blog and entry pages from replicas """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=cls.blog, title='entry_title', body_text='text')
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def test_router(self):
+        request = RequestFactory().get('/')
+        self.assertEqual(Entry.objects.all().db, 'default')
+        with read_from_replica(request):
+            self.assertIn(Entry.objects.all().db, ['replica1', 'replica2'])
+            self.assertEqual(get_user_model().objects.all().db, 'default')
+        request.COOKIES['db_pinned'] = '1'
+        with read_from_replica(request):
+            self.assertEqual(Entry.objects.all().db, 'default')
+
+    def replica_reads(self, url):
+        """ How many reads the view sent to a replica, the replica is default here """
+        picks = []
+
+        def choose(replicas):
+            picks.append(replicas)
+            return 'default'
+        with mock.patch('blog_platform.replicas.random.choice', side_effect=choose):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(picks)
+
+    def test_read_views(self):
+        self.client.force_login(self.user)
+        # a cached feed page is never read from a replica, see CachedFeedMixin
+        self.assertEqual(self.replica_reads(reverse('main')), 0)
+        self.assertGreater(self.replica_reads(reverse('entry-list', args=[self.blog.id])), 0)
+        # the files of the entry are read by the template
+        entry_url = reverse('detail-entry', args=[self.entry.id])
+        self.assertGreaterEqual(self.replica_reads(entry_url), 3)
+        self.assertEqual(self.replica_reads(reverse('blog-list')), 0)
+
+    def test_read_your_writes_after_post(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('create-entry', args=[self.blog.id]),
+                                    {'title': 'new_title', 'body_text': 'text'})
+        self.assertEqual(response.cookies['db_pinned']['max-age'], 10)
+        url = reverse('entry-list', args=[self.blog.id])
+        self.assertEqual(self.replica_reads(url), 0)
+        self.client.cookies.pop('db_pinned')
+        self.assertGreater(self.replica_reads(url), 0)
@@ -0,0 +1,51 @@
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from blogs.models import Blog, Entry
+from blogs.search import search_entries
+
+
+class EntrySearchTest(TestCase):
+    """ Tests for the full-text entry search """
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='testUser_4',
+                                                    password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=user, name='first_blog', tags='tag1')
+        cls.body_match = Entry.objects.create(blog=cls.blog, title='About cats',
+                                              body_text='Django <b>release</b> notes')
+        cls.title_match = Entry.objects.create(blog=cls.blog, title='Django tips',
+                                               body_text='Some text')
+        Entry.objects.create(blog=cls.blog, title='Unrelated', body_text='Nothing here')
+
+    def test_ranked_and_highlighted(self):
+        results = search_entries('django')
+        self.assertEqual(results, [self.title_match, self.body_match])
+        self.assertEqual(results[0].title_highlight, '<mark>Django</mark> tips')
+        self.assertIn('&lt;b&gt;release', results[1].snippet)
+
+    def test_index_follows_changes(self):
+        Entry.objects.bulk_create([Entry(blog=self.blog, title='Пример', body_text='Текст')])
+        self.assertEqual(len(search_entries('пример')), 1)
+        Entry.objects.filter(pk=self.title_match.pk).update(title='Flask tips')
+        self.assertEqual(search_entries('django'), [self.body_match])
+        self.body_match.delete()
+        self.assertEqual(search_entries('django'), [])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(search_entries('django" OR'), [])
+        self.assertEqual(search_entries('   '), [])
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('3 entries indexed', out.getvalue())
+        self.assertEqual(len(search_entries('tips')), 1)
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search'), {'q': 'cats'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'app_blogs/entry_search.html')
+        self.assertContains(response, '<mark>cats</mark>')
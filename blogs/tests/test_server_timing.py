@@ -0,0 +1,43 @@
+import re
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from blogs.models import Blog, Entry
+
+
+class ServerTimingTest(TestCase):
+    """ Tests for the Server-Timing header and log line """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=blog, title='entry_title', body_text='text')
+
+    def timings(self, response):
+        return {name: float(duration) for name, duration
+                in re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])}
+
+    def test_header(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('detail-entry', args=[self.entry.id]))
+        self.assertIn('desc="5 queries"', response['Server-Timing'])
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'db', 'tpl', 'app', 'total'})
+        self.assertGreater(timings['tpl'], 0)
+        self.assertLessEqual(timings['db'] + timings['tpl'], timings['total'] + 0.2)
+
+    def test_log_line(self):
+        with self.assertLogs('blog_platform.timing', 'INFO') as logs:
+            self.client.get(reverse('tag-list'))
+        record = logs.records[0]
+        self.assertEqual(record.url_name, 'tag-list')
+        self.assertEqual(record.status, 200)
+        self.assertTrue(record.getMessage().startswith('url=tag-list status=200 '))
+
+    def test_unresolved_url(self):
+        with self.assertLogs('blog_platform.timing', 'INFO') as logs:
+            response = self.client.get('/missing/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertEqual(logs.records[0].url_name, '-')
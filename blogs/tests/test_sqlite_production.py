@@ -0,0 +1,45 @@
+import os
+import tempfile
+from io import StringIO
+from django.test import SimpleTestCase
+from django.core.management import call_command
+from blog_platform.sqlite.base import DatabaseWrapper, writer_lock
+from blogs.management.commands.sqlite_load_test import open_database, run_load
+
+
+class SqliteProductionTest(SimpleTestCase):
+    """ Tests for the SQLITE_PRODUCTION database backend """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = os.path.join(directory.name, 'db.sqlite3')
+
+    def test_pragmas(self):
+        database = open_database(DatabaseWrapper, self.name)
+        self.addCleanup(database.close)
+        with database.cursor() as cursor:
+            for pragma, value in [('journal_mode', 'wal'), ('busy_timeout', 20000),
+                                  ('synchronous', 1), ('mmap_size', 256 * 1024 * 1024)]:
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], value)
+
+    def test_writer_lock_released(self):
+        database = open_database(DatabaseWrapper, self.name)
+        self.addCleanup(database.close)
+        lock = writer_lock(self.name)
+        for end in (database.commit, database.rollback):
+            database.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+            self.assertTrue(lock.locked())
+            end()
+            database.set_autocommit(True)
+            self.assertFalse(lock.locked())
+
+    def test_concurrent_writers_never_locked_out(self):
+        result = run_load(DatabaseWrapper, self.name, writers=6, readers=2, transactions=20)
+        self.assertEqual(result['failed_writes'], 0)
+        self.assertEqual(result['failed_reads'], 0)
+
+    def test_command(self):
+        output = StringIO()
+        call_command('sqlite_load_test', writers=2, readers=1, transactions=5, stdout=output)
+        self.assertIn('"production"', output.getvalue())
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+from blog_platform.storage import blob_references, blob_storage, collect_blob
+from blogs.models import Blog, Entry, File
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def png():
+    buffer = BytesIO()
+    Image.new('RGB', (10, 10), 'green').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_PROCESSES=0, BLOB_GC_GRACE=0)
+class ContentAddressedStorageTest(TestCase):
+    """ Tests for the deduplicated upload storage """
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='testUser_4',
+                                                    password='1X<ISRUkw+tuK')
+        blog = Blog.objects.create(user=user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=blog, title='entry_title', body_text='text')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_same_content_is_stored_once(self):
+        content = png()
+        first = File.objects.create(entry=self.entry, file=SimpleUploadedFile('a.PNG', content))
+        second = File.objects.create(entry=self.entry, file=SimpleUploadedFile('b.png', content))
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(first.file.name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.png')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(blob_references(first.file.name), 2)
+        self.assertEqual(os.listdir(blob_storage.path('blobs/tmp')), [])
+
+    def test_blob_deleted_with_last_reference(self):
+        content = png()
+        first = File.objects.create(entry=self.entry, file=SimpleUploadedFile('a.png', content))
+        second = File.objects.create(entry=self.entry, file=SimpleUploadedFile('b.png', content))
+        name = first.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(blob_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(blob_storage.exists(name))
+
+    @override_settings(BLOB_GC_GRACE=60)
+    def test_reused_blob_outlives_its_last_reference(self):
+        content = png()
+        first = File.objects.create(entry=self.entry, file=SimpleUploadedFile('a.png', content))
+        name = first.file.name
+        old = time.time() - 120
+        os.utime(blob_storage.path(name), (old, old))
+        # an upload that finds the blob touches it before its row is inserted
+        self.assertEqual(blob_storage.save('b.png', SimpleUploadedFile('b.png', content)), name)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(blob_storage.exists(name))
+        out = StringIO()
+        call_command('sweep_blobs', stdout=out)
+        self.assertIn('0 blobs deleted', out.getvalue())
+
+        os.utime(blob_storage.path(name), (old, old))
+        call_command('sweep_blobs', stdout=out)
+        self.assertIn('1 blobs deleted', out.getvalue())
+        self.assertFalse(blob_storage.exists(name))
+        self.assertFalse(collect_blob(name))
+
+    def test_move_old_files(self):
+        content = png()
+        os.makedirs(blob_storage.path('files'), exist_ok=True)
+        for name in ('files/old1.png', 'files/old2.png'):
+            with open(blob_storage.path(name), 'wb') as file:
+                file.write(content)
+            File.objects.create(entry=self.entry, file=name)
+        call_command('move_media_to_blobs', stdout=StringIO())
+        names = set(File.objects.values_list('file', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names.pop().startswith('blobs/'))
+        self.assertFalse(blob_storage.exists('files/old1.png'))
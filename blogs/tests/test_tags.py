@@ -0,0 +1,76 @@
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from blogs.feed_cache import feed_cache
+from blogs.importers import import_entries
+from blogs.models import Blog, Entry, Tag, parse_tags
+
+
+class TagTest(TestCase):
+    """ Tests for normalized tags and their entry counts """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='Python, django')
+        cls.other = Blog.objects.create(user=cls.user, name='second_blog', tags='python')
+        for i in range(3):
+            Entry.objects.create(blog=cls.blog, title=f'title{i}', body_text='text')
+        Entry.objects.create(blog=cls.other, title='other', body_text='text')
+
+    def setUp(self):
+        feed_cache().clear()
+
+    def counts(self):
+        return dict(Tag.objects.values_list('name', 'entry_count'))
+
+    def test_parse_tags(self):
+        self.assertEqual(parse_tags(' Django,,python ,  Big  Data, django'),
+                         ['big data', 'django', 'python'])
+
+    def test_counts_follow_entries(self):
+        self.assertEqual(self.counts(), {'python': 4, 'django': 3})
+        Entry.objects.filter(blog=self.blog).first().delete()
+        import_entries(SimpleUploadedFile('entry.csv', b'a,b\nc,d\n'), self.other.id)
+        self.assertEqual(self.counts(), {'python': 5, 'django': 2})
+
+    def test_counts_follow_tag_changes(self):
+        self.blog.tags = 'django, orm'
+        self.blog.save()
+        self.assertEqual(self.counts(), {'python': 1, 'django': 3, 'orm': 3})
+        self.other.tag_set.clear()
+        self.assertEqual(self.counts()['python'], 0)
+        self.blog.delete()
+        self.assertEqual(self.counts(), {'python': 0, 'django': 0, 'orm': 0})
+
+    def test_sync_command_repairs_counts(self):
+        Tag.objects.update(entry_count=42)
+        call_command('sync_blog_tags', stdout=StringIO())
+        self.assertEqual(self.counts(), {'python': 4, 'django': 3})
+
+    def test_tag_feed(self):
+        response = self.client.get(reverse('tag-feed', args=['django']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['entry_list']), 3)
+        self.assertEqual(response.context['tag'].entry_count, 3)
+        response = self.client.get(reverse('tag-feed', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_tag_list(self):
+        response = self.client.get(reverse('tag-list'))
+        self.assertEqual([tag.name for tag in response.context['tag_list']],
+                         ['python', 'django'])
+
+    def test_tag_with_slash(self):
+        self.blog.tags = 'CI/CD, python'
+        self.blog.save()
+        response = self.client.get(reverse('tag-list'))
+        self.assertEqual(response.status_code, 200)
+        url = reverse('tag-feed', args=['ci/cd'])
+        self.assertContains(response, f'href="{url}"')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['entry_list']), 3)
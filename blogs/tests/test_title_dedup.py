@@ -0,0 +1,68 @@
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.urls import reverse
+from blogs.models import Blog, Entry, title_hash
+
+
+class TitleDedupTest(TestCase):
+    """ Tests for the per blog title deduplication """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.blog = Blog.objects.create(user=cls.user, name='first_blog', tags='tag1')
+        cls.entry = Entry.objects.create(blog=cls.blog, title='My  Title', body_text='text')
+
+    def test_hash_follows_title(self):
+        self.assertEqual(self.entry.title_hash, title_hash('my title'))
+        self.entry.title = 'renamed'
+        self.entry.save(update_fields=['title'])
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.title_hash, title_hash('Renamed'))
+
+    def test_create_view_rejects_duplicate_title(self):
+        self.client.force_login(self.user)
+        url = reverse('create-entry', args=[self.blog.id])
+        response = self.client.post(url, {'title': 'my title', 'body_text': 'text'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['title'])
+        other = Blog.objects.create(user=self.user, name='second_blog', tags='tag2')
+        response = self.client.post(reverse('create-entry', args=[other.id]),
+                                    {'title': 'my title', 'body_text': 'text'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_edit_view_rejects_duplicate_title(self):
+        self.client.force_login(self.user)
+        other = Entry.objects.create(blog=self.blog, title='other title', body_text='text')
+        url = reverse('edit-entry', args=[other.id])
+        response = self.client.post(url, {'title': 'MY TITLE', 'body_text': 'text'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['title'])
+        response = self.client.post(url, {'title': 'Other  Title', 'body_text': 'new text'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_unique_constraint(self):
+        with self.assertRaises(IntegrityError):
+            Entry.objects.create(blog=self.blog, title='my title', body_text='text')
+
+    def test_backfill_command(self):
+        Entry.objects.update(title_hash='')
+        call_command('backfill_title_hash', stdout=StringIO())
+        self.assertTrue(Entry.objects.with_title(self.blog.id, 'MY TITLE').exists())
+
+    def test_backfill_leaves_duplicates_without_hash(self):
+        # saved before the constraint existed, differs only in case and spacing
+        duplicate = Entry.objects.create(blog=self.blog, title='temporary', body_text='text')
+        Entry.objects.filter(pk=duplicate.pk).update(title='my title')
+        for batch_size in (1, 2000):
+            Entry.objects.update(title_hash='')
+            stderr = StringIO()
+            call_command('backfill_title_hash', batch_size=batch_size, stdout=StringIO(),
+                         stderr=stderr)
+            self.assertEqual(Entry.objects.get(pk=self.entry.pk).title_hash,
+                             title_hash('my title'))
+            self.assertEqual(Entry.objects.get(pk=duplicate.pk).title_hash, '')
+            self.assertIn(f'#{duplicate.id}', stderr.getvalue())
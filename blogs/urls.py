@@ -1,14 +1,33 @@
+from django.conf import settings
 from django.urls import path
+from . import api, async_views, feeds, views
 from .views import *
 
+# under ASGI the read pages are served without a thread, see blogs.async_views
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
+
 urlpatterns = [
     path('create/', BlogCreateView.as_view(), name='create-blog'),
     path('list/', BlogListView.as_view(), name='blog-list'),
     path('edit/<int:pk>/', BlogEditView.as_view(), name='blog-edit'),
-    path('detail/<int:pk>/', BlogDetailView.as_view(), name='entry-list'),
+    path('detail/<int:pk>/', read_views.BlogDetailView.as_view(), name='entry-list'),
     path('detail/<int:pk>/upload/', upload_entry_from_file, name='upload-entry'),
+    path('detail/<int:pk>/upload/<int:job_id>/', import_job_status, name='import-status'),
+    path('detail/<int:pk>/export/', export_entries, name='export-entries'),
+    path('detail/<int:pk>/rss/', feeds.cached_feed(feeds.BlogEntriesFeed()), name='blog-rss'),
+    path('detail/<int:pk>/atom/', feeds.cached_feed(feeds.BlogEntriesAtomFeed()),
+         name='blog-atom'),
     path('entry/<int:pk>/create/', EntryCreateView.as_view(), name='create-entry'),
-    path('entry/<int:pk>/', EntryDetailView.as_view(), name='detail-entry'),
+    path('entry/<int:pk>/', read_views.EntryDetailView.as_view(), name='detail-entry'),
     path('entry/<int:pk>/edit/', EntryEditView.as_view(), name='edit-entry'),
-    path('', MainPageView.as_view(), name='main'),
+    path('search/', EntrySearchView.as_view(), name='search'),
+    path('tags/', TagListView.as_view(), name='tag-list'),
+    path('tags/<path:name>/', TagFeedView.as_view(), name='tag-feed'),
+    path('rss/', feeds.cached_feed(feeds.LatestEntriesFeed()), name='rss'),
+    path('atom/', feeds.cached_feed(feeds.LatestEntriesAtomFeed()), name='atom'),
+    path('api/feed/', api.feed, name='api-feed'),
+    path('api/blogs/<int:pk>/', api.blog_detail, name='api-blog'),
+    path('api/blogs/<int:pk>/entries/', api.blog_entries, name='api-blog-entries'),
+    path('api/entries/<int:pk>/', api.entry_detail, name='api-entry'),
+    path('', read_views.MainPageView.as_view(), name='main'),
 ]
@@ -1,11 +1,27 @@
-from csv import reader
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import redirect, render
+from django.db import IntegrityError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy, reverse
 from django.views import generic
-from .models import Blog, Entry, File
+from blog_platform.replicas import ReplicaReadMixin
+from .models import Blog, Entry, ImportJob, Tag
+from .attachments import attachment_batch
 from .forms import EntryForm, UploadEntryFile
+from .exporters import EXPORT_FORMATS
+from .importers import import_entries
+from .conditional import blog_etag, entry_etag
+from .feed_cache import CachedFeedMixin
+from .pagination import KeysetPaginationMixin, paginate_keyset
+from .search import search_entries
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.text import compress_sequence
+from django.views.decorators.http import condition
+from django.utils.translation import gettext as _
 
 
 # views for crete, view and edit blog model
@@ -16,7 +32,7 @@ class BlogListView(LoginRequiredMixin, generic.ListView):
 
     def get_queryset(self):
         user_id = self.request.user.id
-        queryset = self.model.objects.filter(user_id=user_id)
+        queryset = self.model.objects.filter(user_id=user_id).only('name', *Blog.counter_fields)
         return queryset
 
 
@@ -38,20 +54,49 @@ class BlogEditView(LoginRequiredMixin, generic.UpdateView):
     success_url = reverse_lazy('blog-list')
 
 
-class BlogDetailView(LoginRequiredMixin, generic.DetailView):
+# no Last-Modified: the page also depends on the viewer, see conditional._etag
+@method_decorator(condition(etag_func=blog_etag), name='get')
+class BlogDetailView(LoginRequiredMixin, ReplicaReadMixin, generic.DetailView):
     model = Blog
     template_name = 'app_blogs/entry_list.html'
     context_object_name = 'blog'
+    paginate_by = 20
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        entry_list = self.object.entries.all()
-        context['entry_list'] = entry_list
+        page = paginate_keyset(self.request, self.object.entries.listing(), self.paginate_by)
+        context['page_obj'] = page
+        context['entry_list'] = page.object_list
         return context
 
 
 # view to create, edit entries
-class EntryCreateView(LoginRequiredMixin, generic.CreateView):
+class EntryTitleMixin:
+    """ Entry titles are unique within a blog, see Entry.Meta.constraints """
+    def title_is_taken(self, form, blog_id):
+        entries = Entry.objects.with_title(blog_id, form.cleaned_data.get('title'))
+        if self.object is not None:
+            entries = entries.exclude(pk=self.object.pk)
+        return entries.exists()
+
+    def title_taken(self, form):
+        form.add_error('title', _('В блоге уже есть статья с таким заголовком'))
+        return self.form_invalid(form)
+
+    def save_with_files(self, form):
+        files = self.request.FILES.getlist('file')
+        description = form.cleaned_data.get('description')
+        try:
+            with attachment_batch() as attachments:
+                response = super().form_valid(form)
+                attachments.save(self.object, files, description)
+        except IntegrityError:
+            # another request took the title after title_is_taken
+            return self.title_taken(form)
+        return response
+
+
+class EntryCreateView(LoginRequiredMixin, EntryTitleMixin, generic.CreateView):
     model = Entry
     form_class = EntryForm
     template_name = 'app_blogs/new_entry.html'
@@ -61,22 +106,23 @@ class EntryCreateView(LoginRequiredMixin, generic.CreateView):
 
     def form_valid(self, form):
         blog_id = self.kwargs.get('pk')
+        if self.title_is_taken(form, blog_id):
+            return self.title_taken(form)
         blog = Blog.objects.get(id=blog_id)
         form.instance.blog = blog
-        entry = form.save()
-        files = self.request.FILES.getlist('file')
-        description = form.cleaned_data.get('description')
-        for item in files:
-            file_model = File(entry=entry, file=item, description=description)
-            file_model.save()
-        return super().form_valid(form)
+        return self.save_with_files(form)
 
 
-class EntryDetailView(LoginRequiredMixin, generic.DetailView):
+@method_decorator(condition(etag_func=entry_etag), name='get')
+class EntryDetailView(LoginRequiredMixin, ReplicaReadMixin, generic.DetailView):
     model = Entry
     template_name = 'app_blogs/entry_detail.html'
     context_object_name = 'entry'
 
+    def get_queryset(self):
+        # the author is shown with the entry
+        return self.model.objects.select_related('blog__user')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         entry = self.object
@@ -85,7 +131,7 @@ class EntryDetailView(LoginRequiredMixin, generic.DetailView):
         return context
 
 
-class EntryEditView(LoginRequiredMixin, generic.UpdateView):
+class EntryEditView(LoginRequiredMixin, EntryTitleMixin, generic.UpdateView):
     model = Entry
     template_name = 'app_blogs/entry_edit.html'
     form_class = EntryForm
@@ -95,36 +141,116 @@ class EntryEditView(LoginRequiredMixin, generic.UpdateView):
 
     def form_valid(self, form):
         entry = self.object
+        if self.title_is_taken(form, entry.blog_id):
+            return self.title_taken(form)
         entry.mod_date = timezone.now()
-        files = self.request.FILES.getlist('file')
-        description = form.cleaned_data.get('description')
-        for item in files:
-            file_model = File(entry=entry, file=item, description=description)
-            file_model.save()
-        return super().form_valid(form)
+        return self.save_with_files(form)
 
 
-class MainPageView(generic.ListView):
+class MainPageView(ReplicaReadMixin, CachedFeedMixin, KeysetPaginationMixin,
+                   generic.ListView):
     model = Entry
     template_name = 'app_blogs/entry_all.html'
     context_object_name = 'entry_list'
+    paginate_by = 20
+
+    def get_queryset(self):
+        return self.model.objects.feed()
+
+
+class TagFeedView(MainPageView):
+    """ Main feed restricted to the blogs with a tag """
+    def get_queryset(self):
+        self.tag = get_object_or_404(Tag, name=self.kwargs.get('name'))
+        return self.model.objects.feed().filter(blog__tag_set=self.tag)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = self.tag
+        return context
+
+
+class TagListView(generic.ListView):
+    model = Tag
+    template_name = 'app_blogs/tag_list.html'
+    context_object_name = 'tag_list'
+    tags_limit = 100
+
+    def get_queryset(self):
+        return self.model.objects.filter(entry_count__gt=0)[:self.tags_limit]
+
+
+class EntrySearchView(generic.ListView):
+    template_name = 'app_blogs/entry_search.html'
+    context_object_name = 'entry_list'
+    results_limit = 50
 
+    def get_queryset(self):
+        # ranked by relevance and cut to the best `results_limit` matches
+        return search_entries(self.request.GET.get('q', ''), limit=self.results_limit)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
 
+
+@login_required
 def upload_entry_from_file(request, pk):
+    get_object_or_404(Blog.objects.only('id'), pk=pk, user=request.user)
     if request.method == 'POST':
         form = UploadEntryFile(request.POST, request.FILES)
         if form.is_valid():
-            file = form.cleaned_data.get('file').read()
-            file = file.decode('utf-8').split('\n')
-            csv_reader = reader(file, quotechar='"')
-            for row in csv_reader:
-                if row:  # if not empty line
-                    # check if entry with title does not already exist
-                    entry, created = Entry.objects.get_or_create(
-                        title=row[0],
-                        defaults={"blog_id": pk, "body_text": row[1]})
+            file = form.cleaned_data.get('file')
+            if file.size > settings.ENTRY_IMPORT_INLINE_MAX_SIZE:
+                # large files are imported by the worker, see run_import_worker
+                job = ImportJob.objects.create(blog_id=pk, file=file)
+                messages.info(request, _('Файл поставлен в очередь на загрузку, '
+                                         'номер задачи %(id)d') % {'id': job.id})
+                return redirect(reverse('entry-list', args=[pk]))
+            result = import_entries(file, pk)
+            messages.info(request, _('Загружено статей: %(created)d, пропущено: %(skipped)d, '
+                                     'с ошибками: %(malformed)d') % vars(result))
             return redirect(reverse('entry-list', args=[pk]))
     else:
         form = UploadEntryFile()
     return render(request, 'app_blogs/upload_entry_file.html',
                   {'form': form})
+
+
+@login_required
+def export_entries(request, pk):
+    """
+    All the entries of the own blog as a csv or jsonl download. Streamed
+    as the rows are read, ?gzip=1 compresses it on the way.
+    """
+    blog = get_object_or_404(Blog.objects.only('id'), pk=pk, user=request.user)
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise Http404(_('Неизвестный формат выгрузки'))
+    export, content_type = EXPORT_FORMATS[export_format]
+    content = export(blog.id)
+    filename = f'blog_{blog.id}.{export_format}'
+    if request.GET.get('gzip'):
+        content = compress_sequence(chunk.encode() for chunk in content)
+        content_type, filename = 'application/gzip', filename + '.gz'
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def import_job_status(request, pk, job_id):
+    """ Progress of a queued entry import as json """
+    job = get_object_or_404(ImportJob.objects.defer('file'), pk=job_id, blog_id=pk,
+                            blog__user=request.user)
+    return JsonResponse({
+        'id': job.id,
+        'status': job.status,
+        'processed': job.processed,
+        'created': job.created,
+        'skipped': job.skipped,
+        'malformed': job.malformed,
+        'rows_per_second': job.throughput,
+        'error': job.error,
+    })
@@ -1,13 +1,18 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
+from blog_platform.storage import blob_storage
 
 
 class Profile(models.Model):
     user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE, related_name='profiles',
                                 verbose_name=_('пользователь'))
     registration_date = models.DateField(auto_now_add=True, verbose_name=_('дата регистрации'))
-    avatar = models.ImageField(upload_to='files/', blank=True, verbose_name=_('аватар'))
+    avatar = models.ImageField(upload_to='files/', storage=blob_storage, blank=True,
+                               db_index=True, verbose_name=_('аватар'))
+    # square copy of the avatar for the user bar, made after the avatar is saved
+    avatar_thumb = models.CharField(max_length=255, blank=True, editable=False)
 
     class Meta:
         verbose_name = _('профиль')
@@ -15,3 +20,10 @@ class Profile(models.Model):
 
     def __str__(self):
         return f'Profile of {self.user}'
+
+    @property
+    def avatar_url(self):
+        """ The small avatar when it is ready, else the uploaded one """
+        if self.avatar_thumb:
+            return settings.MEDIA_URL + self.avatar_thumb
+        return self.avatar.url if self.avatar else ''
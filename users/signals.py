@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+from blog_platform.storage import release_blob
+from .models import Profile
+
+
+@receiver(pre_save, sender=Profile)
+def release_replaced_avatar(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    old_avatar = Profile.objects.filter(pk=instance.pk).values_list('avatar', flat=True).first()
+    if old_avatar and old_avatar != instance.avatar.name:
+        release_blob(old_avatar)
+
+
+@receiver(post_delete, sender=Profile)
+def release_avatar(sender, instance, **kwargs):
+    release_blob(instance.avatar.name)
@@ -0,0 +1,50 @@
+import shutil
+import tempfile
+from io import BytesIO
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from blogs.images import thumbnail_name
+from users.models import Profile
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_PROCESSES=0)
+class AvatarTest(TestCase):
+    """ Tests for the user bar avatar """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK')
+        cls.profile = Profile.objects.create(user=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.login(username='testUser_4', password='1X<ISRUkw+tuK')
+
+    def test_profile_loaded_with_user(self):
+        # session and user with profile, no query of its own for the avatar
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_small_avatar_made_on_edit(self):
+        buffer = BytesIO()
+        Image.new('RGB', (300, 200), 'blue').save(buffer, 'PNG')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('profile-edit', args=[self.profile.id]),
+                             {'avatar': SimpleUploadedFile('avatar.png', buffer.getvalue())})
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar_thumb,
+                         thumbnail_name(self.profile.avatar.name, 50))
+        with Image.open(f'{MEDIA_ROOT}/{self.profile.avatar_thumb}') as image:
+            self.assertEqual(image.size, (50, 50))
+        response = self.client.get(reverse('profile'))
+        self.assertContains(response, self.profile.avatar_url)
@@ -0,0 +1,57 @@
+from django.test import RequestFactory, TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from blog_platform.testing import QueryBudgetMixin, query_budget
+from users.models import Profile
+from users.views import MainPageView
+
+
+class UserViewsQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """ Query budgets of the users views, at 10 and at 1000 users """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='testUser_4',
+                                                        password='1X<ISRUkw+tuK',
+                                                        first_name='Name', last_name='Surname')
+        cls.profile = Profile.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.made = 0
+        self.client.force_login(self.user)
+
+    def make_rows(self, count):
+        numbers = range(self.made, self.made + count)
+        self.made += count
+        users = get_user_model().objects.bulk_create(
+            [get_user_model()(username=f'user{n}') for n in numbers])
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+
+    def get(self, url_name, *args, client=None):
+        response = (client or self.client).get(reverse(url_name, args=args))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    @query_budget(0)
+    def test_login(self):
+        self.get('login', client=self.client_class())
+
+    @query_budget(0)
+    def test_register(self):
+        self.get('register', client=self.client_class())
+
+    @query_budget(2)
+    def test_profile(self):
+        self.get('profile')
+
+    @query_budget(3)
+    def test_profile_edit(self):
+        self.get('profile-edit', self.profile.pk)
+
+    @query_budget(2)
+    def test_main_page(self):
+        # not routed: the user and the profile for the user bar
+        request = RequestFactory().get('/')
+        request.user = get_user_model().objects.get(pk=self.user.pk)
+        response = MainPageView.as_view()(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
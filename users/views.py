@@ -6,6 +6,9 @@ from django.views.generic import TemplateView, UpdateView
 from .forms import AuthForm, RegistrationForm, ProfileForm
 from .models import Profile
 from django.contrib.auth.mixins import LoginRequiredMixin
+from blogs.images import schedule_thumbnail
+
+AVATAR_SIZE = 50
 
 
 class MainPageView(TemplateView):
@@ -42,6 +45,7 @@ class ProfileView(LoginRequiredMixin, TemplateView):
 
 class ProfileEditView(LoginRequiredMixin, UpdateView):
     model = Profile
+    queryset = Profile.objects.select_related('user')
     form_class = ProfileForm
     template_name = 'app_users/profile-edit.html'
     success_url = reverse_lazy('profile')
@@ -63,4 +67,11 @@ class ProfileEditView(LoginRequiredMixin, UpdateView):
         user.first_name = form.cleaned_data.get('first_name')
         user.last_name = form.cleaned_data.get('last_name')
         user.save()
-        return super().form_valid(form)
+        avatar_changed = 'avatar' in form.changed_data
+        if avatar_changed:
+            # the small avatar is made again from the new one after commit
+            profile.avatar_thumb = ''
+        response = super().form_valid(form)
+        if avatar_changed and profile.avatar:
+            schedule_thumbnail(profile, 'avatar', 'avatar_thumb', AVATAR_SIZE)
+        return response